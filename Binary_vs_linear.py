@@ -1,7 +1,24 @@
+import numpy as np
 import pandas as pd
 import random
-import time
-from functools import wraps
+import sys
+from bisect import bisect_left
+from pathlib import Path
+
+# shared benchmark tools live in portfolio_project
+sys.path.append(str(Path(__file__).resolve().parent / "portfolio_project"))
+from function_timer import timer, benchmark
+from bench_history import HISTORY_PATH, record
+from complexity import fit_frame
+from op_counter import count_operations
+from bloom_filter import BloomFilter, guard
+from range_query import count_range, count_range_many, range_view
+from searchable import SearchableCollection
+from sorted_index import SortedIndex
+from Linear_Search import linearSearch
+
+# sizes for index_cases, 8 byte keys from 8 KB up to 64 MB
+INDEX_SIZES = (2 ** 10, 2 ** 14, 2 ** 18, 2 ** 21, 2 ** 23)
 
 
 def collect_user_inputs():
@@ -47,31 +64,6 @@ def create_array(arr_size):
     return random.sample(range(min_int, array_size * 2), array_size)
 
 
-def timer(func):
-
-    """
-    wrapper for search function that starts a times, runs the function 
-    then ends the times and takes end time - start time to find run_time
-    clear wrapper after each iteration. Can collect the last runtime 
-    using function.last_run
-    """
-
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        # record start time
-        start = time.perf_counter()
-        # run function
-        result = func(*args, **kwargs)
-        # stop timer and find runtime
-        run_time = time.perf_counter() - start 
-        # store run_tim as last run
-        wrapper.last_run = run_time
-        # pass returned results from function
-        return result
-    # clear last_run value
-    wrapper.last_run = None
-    return wrapper
-
 @timer # wrapper
 def linear_search(arr, target):
 
@@ -112,8 +104,411 @@ def binary_search(arr, target):
     # if target not found return -1
     return -1
 
-def test_cases():
+def _bounded_binary_search(arr, target, low, high):
+
+    """
+    Binary search of arr[low..high] inclusive, -1 if target is not there.
+    Indexes past the end of arr count as larger than target, so high may
+    overshoot the length of a sequence whose length is unknown.
+    """
+
+    while (high >= low):
+        mid = (high + low) // 2
+        try:
+            value = arr[mid]
+        except IndexError:
+            # past the end, search the left half
+            high = mid - 1
+            continue
+        if (value < target):
+            low = mid + 1
+        elif(value > target):
+            high = mid - 1
+        else:
+            return mid
+    return -1
+
+@timer
+def interpolation_search(arr, target):
+
+    """
+    Requires arr be an array sorted ascending, works best when values are
+    close to uniformly spread (like create_array) where it needs about
+    log log n probes. Each probe guesses the target's position from its
+    value instead of taking the middle. Skewed data can make guesses crawl
+    one index at a time, so after log2 n guesses the remaining range is
+    finished with binary search, never worse than about 2 log n probes.
+    """
+
+    low = 0
+    high = len(arr) - 1
+    guesses = len(arr).bit_length() #guesses allowed before falling back
+    #target can only be in range while it lies between the end values
+    while (high >= low and arr[low] <= target <= arr[high]):
+        if guesses == 0:
+            return _bounded_binary_search(arr, target, low, high)
+        guesses -= 1
+        if arr[high] == arr[low]:
+            pos = low #every value in range is equal to target
+        else:
+            pos = low + int((target - arr[low]) * (high - low) // (arr[high] - arr[low]))
+            pos = min(max(pos, low), high) #float rounding can land outside
+        if (arr[pos] < target):
+            low = pos + 1
+        elif (arr[pos] > target):
+            high = pos - 1
+        else:
+            return pos
+    return -1
+
+@timer
+def exponential_search(arr, target):
+
+    """
+    Requires arr be sorted ascending. Probes indexes 1, 2, 4, 8, ... until
+    one holds a value >= target, then binary searches the last doubling,
+    so a target at index i costs about 2 log i probes however long arr is.
+    Only indexing is used, an IndexError marks the end, so arr can be a
+    sequence or stream whose length is unknown.
+    """
+
+    bound = 1
+    #double bound until arr[bound] >= target or bound is past the end
+    while True:
+        try:
+            if arr[bound] >= target:
+                break
+        except IndexError:
+            break
+        bound *= 2
+    return _bounded_binary_search(arr, target, bound // 2, bound)
+
+@timer
+def search_many(arr, keys):
+
+    """
+    Find many keys in one pass over arr, which must be sorted ascending.
+    Returns the index of each key in arr, -1 where a key is missing,
+    same as calling binary_search once per key.
+
+    NumPy arrays (arr or keys) take a vectorized searchsorted path and
+    get back a NumPy index array. Other sequences are walked merge style:
+    keys are visited in sorted order and the search position only moves
+    forward, galloping (steps of 1, 2, 4, ...) then bisecting to the next
+    key, so a batch costs O(m log(n/m)) probes instead of m log n.
+    """
+
+    if isinstance(arr, np.ndarray) or isinstance(keys, np.ndarray):
+        arr = np.asarray(arr)
+        keys = np.asarray(keys)
+        if not len(arr):
+            return np.full(len(keys), -1, dtype=np.intp)
+        index = np.searchsorted(arr, keys) #leftmost index where each key fits
+        #misses past the end point at the last element, never equal to the key
+        found = arr[np.minimum(index, len(arr) - 1)] == keys
+        return np.where(found, index, -1)
+
+    n = len(arr)
+    results = [-1] * len(keys)
+    #keys sorted already skip the sort
+    if all(keys[i] <= keys[i + 1] for i in range(len(keys) - 1)):
+        order = range(len(keys))
+    else:
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+    low = 0 #every key still to find is at or after low
+    for k in order:
+        key = keys[k]
+        #gallop from low until arr[high] >= key or the end is passed
+        step = 1
+        high = low
+        while high < n and arr[high] < key:
+            low = high + 1
+            high += step
+            step *= 2
+        low = bisect_left(arr, key, low, min(high, n))
+        if low < n and arr[low] == key:
+            results[k] = low
+    return results
+
+def batch_cases(size=2 ** 15, batches=(1, 16, 256, 4096, 2 ** 15), history=HISTORY_PATH):
+
+    """
+    Time looking up batches of keys in one sorted array of the given size:
+    binary_search once per key vs search_many on lists and on NumPy arrays.
+    About half the keys are misses. Times are per key so batch sizes compare
+    directly, timings are appended to the benchmark history (None to skip).
+    """
+
+    arr = create_array(size)
+    arr.sort()
+    np_arr = np.array(arr)
+    results = []
+    recorded = []
+    for batch in batches:
+        keys = [random.randrange(0, size * 2) for _ in range(batch)]
+        np_keys = np.array(keys)
+        expected = [binary_search(arr, key) for key in keys]
+        #binary_search may return any index of a duplicate, arr has none
+        assert search_many(arr, keys) == expected
+        assert search_many(np_arr, np_keys).tolist() == expected
+        stats = {
+            "binary search per key": benchmark(
+                lambda: [binary_search(arr, key) for key in keys]),
+            "search_many list": benchmark(search_many, lambda: (arr, keys)),
+            "search_many numpy": benchmark(search_many, lambda: (np_arr, np_keys))
+        }
+        row = {"size": size, "keys per batch": batch,
+               "hits": sum(i != -1 for i in expected)}
+        for name, result in stats.items():
+            row[f"{name} time per key(seconds)"] = result.median / batch
+            recorded.append(({"algorithm": name, "size": size, "batch": batch},
+                             result.samples))
+        results.append(row)
+    if history is not None:
+        record("search_many", recorded, history)
+    return pd.DataFrame(results).to_string(index=False)
+
+def cache_sizes():
+
+    """
+    Return {level: bytes} of this CPU's data caches, read from Linux sysfs.
+    Empty when the sizes are not available.
+    """
+
+    sizes = {}
+    for cache in Path("/sys/devices/system/cpu/cpu0/cache").glob("index*"):
+        try:
+            if (cache / "type").read_text().strip() == "Instruction":
+                continue
+            level = int((cache / "level").read_text())
+            size = (cache / "size").read_text().strip()
+        except (OSError, ValueError):
+            continue
+        units = {"K": 2 ** 10, "M": 2 ** 20, "G": 2 ** 30}
+        sizes[level] = int(size.rstrip("KMG")) * units.get(size[-1], 1)
+    return sizes
+
+def index_cases(sizes=INDEX_SIZES, batch=2 ** 14, history=HISTORY_PATH):
+
+    """
+    Time single key lookups with linearSearch, binary_search and the
+    Eytzinger SortedIndex.find, and batches of keys with search_many and
+    SortedIndex.find_many, on sorted arrays whose 8 byte keys grow past
+    the L2 and L3 caches. Every call looks up a new random key (about
+    half are misses) so the cache is not kept warm by repeating one key.
+    Timings are appended to the benchmark history (None to skip).
+    """
+
+    caches = cache_sizes()
+    results = []
+    recorded = []
+    for size in sizes:
+        arr = create_array(size)
+        arr.sort()
+        np_arr = np.array(arr)
+        index = SortedIndex(np_arr)
+        keys = np.array([random.randrange(size * 2) for _ in range(batch)])
+        assert index.find_many(keys).tolist() == search_many(np_arr, keys).tolist()
+        stats = {
+            "linear search": benchmark(
+                linearSearch, lambda: (arr, random.randrange(size * 2))),
+            "binary search": benchmark(
+                binary_search, lambda: (arr, random.randrange(size * 2))),
+            "SortedIndex find": benchmark(
+                index.find, lambda: (random.randrange(size * 2),)),
+            "search_many numpy": benchmark(search_many, lambda: (np_arr, keys)),
+            "SortedIndex find_many": benchmark(index.find_many, lambda: (keys,))
+        }
+        data_bytes = np_arr.nbytes
+        row = {"size": size, "data MB": data_bytes / 2 ** 20,
+               #largest cache the keys no longer fit in
+               "exceeds": max((f"L{level}" for level, cache in caches.items()
+                               if data_bytes > cache), default="none")}
+        for name, result in stats.items():
+            per_key = result.median / (batch if "many" in name else 1)
+            row[f"{name} time per key(seconds)"] = per_key
+            recorded.append(({"algorithm": name, "size": size}, result.samples))
+        results.append(row)
+    if history is not None:
+        record("sorted_index", recorded, history)
+    report = pd.DataFrame(results).to_string(index=False)
+    report += "\ndata caches: " + ", ".join(f"L{level} {cache // 2 ** 10} KB"
+                                          for level, cache in sorted(caches.items()))
+    return report
+
+def adaptive_cases(size=2 ** 12, query_counts=(1, 10, 100, 1000), history=HISTORY_PATH):
+
+    """
+    Time workloads of 1 to 1000 lookups in an unsorted array of the given
+    size: linear_search per key, sorting a copy then binary_search per key,
+    and SearchableCollection with each index, which scans until the scans
+    cost more than building its index. About half the keys are misses.
+    Times are totals for the whole workload, so the adaptive collection
+    should follow whichever fixed strategy is cheaper. Timings are appended
+    to the benchmark history (None to skip).
+    """
+
+    arr = create_array(size)
+    results = []
+    recorded = []
+    for queries in query_counts:
+        keys = [random.randrange(size * 2) for _ in range(queries)]
+
+        def scan_each():
+            return [linear_search(arr, key) for key in keys]
+
+        def sort_then_binary():
+            ordered = sorted(arr)
+            return [binary_search(ordered, key) for key in keys]
+
+        def adaptive(collection):
+            return [collection.find(key) for key in keys]
+
+        stats = {
+            "linear search": benchmark(scan_each),
+            "sort + binary search": benchmark(sort_then_binary),
+            "adaptive sorted": benchmark(adaptive, lambda: (SearchableCollection(arr),)),
+            "adaptive hash": benchmark(
+                adaptive, lambda: (SearchableCollection(arr, index="hash"),))
+        }
+        #one more run to report what the adaptive collections ended up using
+        row = {"size": size, "queries": queries}
+        for index in ("sorted", "hash"):
+            collection = SearchableCollection(arr, index=index)
+            assert adaptive(collection) == scan_each()
+            collection_stats = collection.stats()
+            row[f"{index} strategy"] = collection_stats.strategy
+            row[f"{index} build seconds"] = collection_stats.build_seconds
+        for name, result in stats.items():
+            row[f"{name} total(seconds)"] = result.median
+            recorded.append(({"algorithm": name, "size": size, "queries": queries},
+                             result.samples))
+        results.append(row)
+    if history is not None:
+        record("adaptive_search", recorded, history)
+    return pd.DataFrame(results).to_string(index=False)
+
+def bloom_cases(size=2 ** 15, miss_rates=(0.5, 0.9, 0.99), error_rate=0.01,
+                history=HISTORY_PATH):
+
+    """
+    Time linear_search, binary_search and SortedIndex.find with and without
+    a Bloom filter in front, on workloads where the given fraction of
+    lookups miss. Also reports the filter's size and its false positive
+    rate measured on 100000 keys that are not in the array. Timings are
+    appended to the benchmark history (None to skip).
+    """
+
+    arr = create_array(size)
+    arr.sort()
+    stored = set(arr)
+    #misses drawn from the same range as the values, like real absent IDs
+    misses = [key for key in range(size * 2) if key not in stored]
+    bloom = BloomFilter.from_values(arr, error_rate)
+    index = SortedIndex(arr)
+    searches = {
+        "linear search": (linear_search, True),
+        "binary search": (binary_search, True),
+        "SortedIndex find": (index.find, False)
+    }
+    results = []
+    recorded = []
+    for miss_rate in miss_rates:
+        def pick():
+            return random.choice(misses) if random.random() < miss_rate else random.choice(arr)
+        row = {"size": size, "miss rate": miss_rate}
+        for name, (search, takes_array) in searches.items():
+            filtered = guard(search, bloom)
+            for label, func in ((name, search), (f"{name} + bloom", filtered)):
+                if takes_array:
+                    stats = benchmark(func, lambda: (arr, pick()))
+                else:
+                    stats = benchmark(func, lambda: (pick(),))
+                row[f"{label} time(seconds)"] = stats.median
+                recorded.append(({"algorithm": label, "size": size, "miss rate": miss_rate},
+                                 stats.samples))
+        results.append(row)
+    if history is not None:
+        record("bloom", recorded, history)
+    measured = bloom.measure_error_rate(random.choice(misses) for _ in range(100000))
+    report = pd.DataFrame(results).to_string(index=False)
+    report += (f"\nbloom filter: {bloom.nbytes} bytes ({8 * bloom.nbytes / size:.1f} bits per key), "
+               f"{bloom.num_hashes} hashes, false positive rate "
+               f"{measured:.4f} measured vs {bloom.expected_error_rate():.4f} expected")
+    return report
+
+def range_cases(size=2 ** 16, widths=(10, 1000, 100000), queries=1000, history=HISTORY_PATH):
+
+    """
+    Time range queries, "how many values between a and b", over a sorted
+    array of the given size for ranges of each width: a linear scan,
+    count_range per range on the list, count_range_many on a NumPy array
+    and on a SortedIndex, and summing range_view without copying the range.
+    Times are per range, appended to the benchmark history (None to skip).
+    """
+
+    arr = create_array(size)
+    arr.sort()
+    np_arr = np.array(arr)
+    index = SortedIndex(np_arr)
+    results = []
+    recorded = []
+    for width in widths:
+        los = [random.randrange(size * 2) for _ in range(queries)]
+        his = [lo + width - 1 for lo in los]
+        np_los, np_his = np.array(los), np.array(his)
+
+        def linear_count():
+            return [sum(1 for v in arr if lo <= v <= hi) for lo, hi in zip(los, his)]
+
+        def list_count():
+            return [count_range(arr, lo, hi) for lo, hi in zip(los, his)]
+
+        def view_sum():
+            return [range_view(np_arr, lo, hi).sum() for lo, hi in zip(los, his)]
+
+        expected = list_count()
+        assert count_range_many(index, np_los, np_his).tolist() == expected
+        stats = {
+            "count_range list": benchmark(list_count),
+            "count_range_many numpy": benchmark(
+                count_range_many, lambda: (np_arr, np_los, np_his)),
+            "count_range_many SortedIndex": benchmark(
+                count_range_many, lambda: (index, np_los, np_his)),
+            "range_view numpy sum": benchmark(view_sum)
+        }
+        #a full scan per range, one trial is plenty to show the gap
+        if width == widths[0]:
+            stats["linear scan"] = benchmark(linear_count, repeat=1, number=1)
+        row = {"size": size, "range width": width,
+               "mean values in range": sum(expected) / queries}
+        for name, result in stats.items():
+            row[f"{name} time per range(seconds)"] = result.median / queries
+            recorded.append(({"algorithm": name, "size": size, "width": width},
+                             result.samples))
+        results.append(row)
+    if history is not None:
+        record("range_query", recorded, history)
+    return pd.DataFrame(results).to_string(index=False)
+
+def test_cases(history=HISTORY_PATH):
+
+    """
+    Time binary, linear, interpolation and exponential search on sorted
+    arrays of 2^3 to 2^15, append the timings to the benchmark history
+    (None to skip) and fit how each search scales (binary and exponential
+    should be log n, linear n).
+    """
+
+    searches = {
+        "binary": binary_search,
+        "linear": linear_search,
+        "interpolation": interpolation_search,
+        "exponential": exponential_search
+    }
+    expected = {"binary": "log n", "linear": "n", "exponential": "log n"}
     results = []
+    recorded = []
     for e in range (1, 16):
         size = 2 ** e
         arr = create_array(size)
@@ -121,32 +516,57 @@ def test_cases():
         key = random.choice(arr)
         #dont print first two warmup runs
         if e <= 2:
-            binary_search(arr, key)
-            linear_search(arr, key)
+            for search in searches.values():
+                search(arr, key)
             continue
-        #after warmup run both searches, grab the run times 
-        binary_result = binary_search(arr, key)
-        binary_time = binary_search.last_run
-        linear_result = linear_search(arr, key)
-        linear_time = linear_search.last_run
         # store n, size, index, and search times for each test
-        results.append({
+        row = {
             "n": e,
             "size": size,
-            "key found at index": binary_result, #either result would work here
-            "binary search time(seconds)": binary_time,
-            "linear search time(seconds)": linear_time
-        })
+            "key found at index": binary_search(arr, key) #any search would work here
+        }
+        #after warmup run every search, repeated trials give stable times
+        for alg, search in searches.items():
+            stats = benchmark(search, lambda: (arr, key))
+            row[f"{alg} search time(seconds)"] = stats.median
+            row[f"{alg} IQR(seconds)"] = stats.iqr
+            # probes = loop iterations of counted copies, the timed searches stay plain
+            row[f"{alg} probes"] = count_operations(search, arr, key)['iterations']
+            recorded.append(({"algorithm": alg, "size": size}, stats.samples))
+        results.append(row)
+    if history is not None:
+        record("search", recorded, history)
     # convert to dataframe
     df = pd.DataFrame(results)
+    # fit each search's times to a complexity model
+    series = pd.DataFrame(
+        [{"Algorithm": alg, "Size": row["size"], "Time": row[f"{alg} search time(seconds)"]}
+         for row in results for alg in searches])
+    # interpolation's log log n is not a fitted model, it is left unchecked
+    scaling = fit_frame(series, ["Algorithm"], expected=lambda s: expected.get(s[0]))
+    report = df.to_string(index=False)
+    report += "\n\nScaling fit and predicted seconds at production sizes:\n"
+    report += scaling.drop(columns="Warning").to_string(index=False)
+    for _, row in scaling[scaling["Warning"] != ""].iterrows():
+        report += f"\nWARNING: {row['Algorithm']} search {row['Warning']}"
+    report += "\n\nBatched lookups, keys per batch against one sorted array:\n"
+    report += batch_cases(history=history)
     # print result summary table view
-    return df.to_string(index=False)
+    return report
 
 if __name__ == '__main__':
 
     print("Comparing Linear vs Binary Search on a sorted array")
     print("Example results as n grows shows Binary faster on larger n:")
     print(test_cases())
+    print("Adaptive SearchableCollection vs fixed strategies as lookups repeat:")
+    print(adaptive_cases())
+    print("Bloom filter in front of each search as most lookups miss:")
+    print(bloom_cases())
+    print("Range counts and views on a sorted array:")
+    print(range_cases())
+    print("Cache friendly SortedIndex vs linear and binary search as arrays outgrow the cache:")
+    print(index_cases())
     print("Test your own example:")
     size, key = collect_user_inputs()
     arr = create_array(size)
@@ -14,6 +14,7 @@ def print_results(key):
         print(f"{key} is located at index {index}.")
     
 
-print_results(12) # 12 is located at index 5.
-print_results(2) # 2 is located at index 9.
-print_results(10) # 10 is not in the array.
\ No newline at end of file
+if __name__ == '__main__':
+    print_results(12) # 12 is located at index 5.
+    print_results(2) # 2 is located at index 9.
+    print_results(10) # 10 is not in the array.
@@ -1,8 +1,45 @@
+import math
+import pandas as pd
+import random
+import sys
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress
+from pathlib import Path
+
+# shared benchmark tools live in portfolio_project
+sys.path.append(str(Path(__file__).resolve().parent / "portfolio_project"))
+from function_timer import timer, benchmark
+from bench_history import HISTORY_PATH, record
+
+# products of this many factors or fewer are multiplied in a plain loop
+SPLIT_LEAF_SIZE = 16
+# below this n the prime swing recursion stops and multiplies directly
+SWING_BASE = 32
+# below this n process pool mode runs serially, starting workers costs more
+PARALLEL_MIN_N = 20000
+# factorial_cases sizes, 10^2 to 10^7
+FACTORIAL_SIZES = tuple(10 ** e for e in range(2, 8))
+# memory the exact factorial memo may hold before evicting, in bytes
+MEMO_MAX_BYTES = 64 * 2 ** 20
+# factorials up to this n are never evicted, they are tiny and used most
+MEMO_KEEP_N = 256
+# modular tables kept at once, least recently used is dropped first
+MOD_TABLES_MAX = 4
+# entries per modular table, fact and inv_fact take 16 bytes per entry
+# (16 MB per table); larger n are computed without growing the tables
+MOD_TABLE_MAX_ENTRIES = 2 ** 20
+# largest n each algorithm is benchmarked at: recursion hits the recursion
+# limit and iteration is quadratic, both would run for hours beyond these
+MAX_N = {"recursive": 900, "iterative": 10 ** 5}
+
 def recursive_factorial(n):
-    #Base case to exit recursion once n reaches 1
-    if (n == 1):
+    #Base case to exit recursion once n reaches 1 (0! is 1 too)
+    if (n <= 1):
         return 1
-    #Recursive case, while n > 1 recursively call the function 
+    #Recursive case, while n > 1 recursively call the function
     # reducing n by 1 each time until the base case is hit
     return (n * recursive_factorial(n-1))
 
@@ -14,7 +51,476 @@ def iterative_factorial(n):
         sum *= (n-i)
     return sum
 
+def product_range(low, high):
+
+    """
+    Return the product of the integers low < i <= high. The range is split
+    in half recursively (binary splitting) so both operands of every
+    multiplication are about the same size, which is where big integer
+    multiplication is fastest, instead of one huge times one small.
+    """
+
+    if high - low <= SPLIT_LEAF_SIZE:
+        result = 1
+        for i in range(low + 1, high + 1):
+            result *= i
+        return result
+    mid = (low + high) // 2
+    return product_range(low, mid) * product_range(mid, high)
+
+def product_list(values):
+
+    """
+    Return the product of a list of integers multiplied pairwise as a
+    balanced tree, same reason as product_range.
+    """
+
+    values = list(values)
+    if not values:
+        return 1
+    while len(values) > 1:
+        #multiply neighbours, an odd one out waits for the next round
+        paired = [values[i] * values[i + 1] for i in range(0, len(values) - 1, 2)]
+        if len(values) % 2:
+            paired.append(values[-1])
+        values = paired
+    return values[0]
+
+def _check_n(n):
+    if n < 0:
+        raise ValueError("factorial is not defined for negative numbers")
+
+@timer
+def binary_split_factorial(n, workers=None):
+
+    """
+    Return n! as a product tree over 1..n. With workers > 1 the range is cut
+    into chunks whose products are computed in a process pool, then the
+    chunk products are combined as a balanced tree in this process.
+    """
+
+    _check_n(n)
+    if not workers or workers <= 1 or n < PARALLEL_MIN_N:
+        return product_range(0, n)
+    #several chunks per worker so an uneven chunk does not leave workers idle
+    chunks = workers * 4
+    bounds = [n * i // chunks for i in range(chunks + 1)]
+    with ProcessPoolExecutor(workers) as pool:
+        products = list(pool.map(product_range, bounds[:-1], bounds[1:]))
+    return product_list(products)
+
+def primes_up_to(n):
+
+    """
+    Return the list of primes <= n with a sieve of Eratosthenes.
+    """
+
+    if n < 2:
+        return []
+    sieve = bytearray([1]) * (n + 1)
+    sieve[0] = sieve[1] = 0
+    for p in range(2, math.isqrt(n) + 1):
+        if sieve[p]:
+            #cross out multiples of p from p^2, smaller ones are already out
+            sieve[p * p::p] = bytes(len(range(p * p, n + 1, p)))
+    return list(compress(range(n + 1), sieve))
+
+def swing(n, primes):
+
+    """
+    Return the swinging factorial n! / (n//2)!^2 from its prime factors.
+    primes must hold every prime <= n. The exponent of p is the number of
+    odd values among n // p, n // p^2, ...: primes above n/2 appear once,
+    primes in (n/3, n/2] never, primes above sqrt(n) at most once.
+    """
+
+    factors = []
+    root = math.isqrt(n)
+    end = bisect_right(primes, n)
+    for p in primes[:bisect_right(primes, root)]:
+        q, power = n, 1
+        while q >= p:
+            q //= p
+            if q & 1:
+                power *= p
+        if power > 1:
+            factors.append(power)
+    #primes in (sqrt(n), n / 3]
+    for p in primes[bisect_right(primes, root):bisect_right(primes, n // 3)]:
+        if (n // p) & 1:
+            factors.append(p)
+    factors.extend(primes[bisect_right(primes, n // 2):end])
+    return product_list(factors)
+
+@timer
+def prime_swing_factorial(n):
+
+    """
+    Return n! with Luschny's prime swing algorithm:
+    n! = ((n // 2)!)^2 * swing(n). Each level squares one number and
+    multiplies by a product of prime powers, so operands stay balanced and
+    there are only about log2 n big multiplications.
+    """
+
+    _check_n(n)
+    primes = primes_up_to(n)
+    levels = []
+    while n >= SWING_BASE:
+        levels.append(n)
+        n //= 2
+    result = product_range(0, n)
+    for m in reversed(levels):
+        result = result * result * swing(m, primes)
+    return result
+
+class FactorialMemo:
+
+    """
+    Exact factorials remembered between calls. Asking for n! starts from
+    the largest remembered m! <= n and multiplies in (m, n] with
+    product_range, so nearby requests are cheap. Factorials of n above
+    keep_n are evicted least recently used first once their total size
+    passes max_bytes, so memory stays bounded however large n gets.
+    """
+
+    def __init__(self, max_bytes=MEMO_MAX_BYTES, keep_n=MEMO_KEEP_N):
+        self.max_bytes = max_bytes
+        #always kept, grown in one pass the first time it is needed
+        self._small = [1]
+        self._keep_n = keep_n
+        #n -> n! for n > keep_n, oldest use first
+        self._large = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def small(self, n):
+
+        """
+        Return the never evicted table of 0! .. keep_n! grown to cover n,
+        or None if n is above keep_n.
+        """
+
+        small = self._small
+        if n < len(small):
+            return small
+        if n > self._keep_n:
+            return None
+        while len(small) <= n:
+            small.append(small[-1] * len(small))
+        return small
+
+    def __call__(self, n):
+        _check_n(n)
+        if n <= self._keep_n:
+            return self.small(n)[n]
+        if n in self._large:
+            self.hits += 1
+            self._large.move_to_end(n)
+            return self._large[n]
+        self.misses += 1
+        #nearest remembered factorial below n to start from
+        start = max((m for m in self._large if m < n), default=self._keep_n)
+        base = self._large[start] if start in self._large else self(start)
+        result = base * product_range(start, n)
+        self._large[n] = result
+        self._bytes += (result.bit_length() + 7) // 8
+        while self._bytes > self.max_bytes and len(self._large) > 1:
+            _, evicted = self._large.popitem(last=False)
+            self._bytes -= (evicted.bit_length() + 7) // 8
+        return result
+
+    def nbytes(self):
+        return self._bytes
+
+def is_prime(n):
+
+    """
+    Return True if n is prime. Miller-Rabin with the first twelve prime
+    bases, which has no false positives below 3.3 * 10^24, so every modulus
+    ModularFactorials accepts is decided exactly.
+    """
+
+    if n < 2:
+        return False
+    bases = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+    if n in bases:
+        return True
+    if any(n % b == 0 for b in bases):
+        return False
+    #n - 1 = d * 2^s with d odd
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for b in bases:
+        x = pow(b, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+class ModularFactorials:
+
+    """
+    n! mod p, 1 / n! mod p, binomials and permutations mod a prime p in
+    O(1) per lookup. fact and inv_fact are array('q') tables built in one
+    pass up to size (grown when a larger n is asked for): fact upwards,
+    then one modular inverse of the top entry and inv_fact downwards with
+    inv_fact[i - 1] = inv_fact[i] * i.
+
+    Tables stop at max_entries. Above that, binomials and permutations
+    multiply the k top factors, and n! multiplies up from the top of the
+    table or, by Wilson's theorem ((p - 1)! = -1 mod p), down from p - 1,
+    whichever is shorter. That costs O(k) or O(n) time and no memory.
+    """
+
+    def __init__(self, p, size=1000, max_entries=MOD_TABLE_MAX_ENTRIES):
+        if not 2 <= p < 2 ** 63:
+            raise ValueError("modulus must be a prime between 2 and 2^63")
+        if not is_prime(p):
+            #inverses of factorials only exist mod a prime
+            raise ValueError(f"modulus must be prime, {p} is not")
+        self.p = p
+        self.max_entries = max_entries
+        self.fact = array('q', [1])
+        self.inv_fact = array('q', [1])
+        self.grow(size)
+
+    def grow(self, size):
+
+        """
+        Extend the tables to cover 0..size (capped at p - 1, every larger
+        factorial is 0 mod p, and at max_entries).
+        """
+
+        p = self.p
+        size = min(size, p - 1, self.max_entries)
+        old = len(self.fact) - 1
+        if size <= old:
+            return
+        fact = self.fact
+        for i in range(old + 1, size + 1):
+            fact.append(fact[-1] * i % p)
+        #inverses of the new entries only, walking down from the new top
+        new_inv = array('q', bytes(8 * (size - old)))
+        inv = pow(fact[size], -1, p)
+        for i in range(size, old, -1):
+            new_inv[i - old - 1] = inv
+            inv = inv * i % p
+        self.inv_fact.extend(new_inv)
+
+    def _product(self, low, high):
+
+        """
+        Return the product of the integers low < i <= high mod p.
+        """
+
+        p = self.p
+        result = 1
+        for i in range(low + 1, high + 1):
+            result = result * i % p
+        return result
+
+    def factorial(self, n):
+        p = self.p
+        if n >= p:
+            return 0 #n! has p as a factor
+        if n >= len(self.fact) and n <= self.max_entries:
+            self.grow(max(n, 2 * (len(self.fact) - 1)))
+        if n < len(self.fact):
+            return self.fact[n]
+        top = len(self.fact) - 1
+        if p - 1 - n < n - top:
+            #Wilson: n! = (p - 1)! / ((n + 1) ... (p - 1)) = -1 / that
+            return (p - 1) * pow(self._product(n, p - 1), -1, p) % p
+        return self.fact[top] * self._product(top, n) % p
+
+    def binom(self, n, k):
+        if 0 <= k <= n < len(self.fact):
+            #table hit, the common case
+            return self.fact[n] * self.inv_fact[k] % self.p * self.inv_fact[n - k] % self.p
+        if k < 0 or k > n:
+            return 0
+        p = self.p
+        if n >= p:
+            #Lucas: multiply the binomials of the base p digits
+            result = 1
+            while n or k:
+                result = result * self.binom(n % p, k % p) % p
+                n //= p
+                k //= p
+            return result
+        if n <= self.max_entries:
+            self.factorial(n) #grow the tables if needed
+        if n < len(self.fact):
+            return self.fact[n] * self.inv_fact[k] % p * self.inv_fact[n - k] % p
+        #past the tables: the k top factors over k!, for the smaller k
+        k = min(k, n - k)
+        if k <= self.max_entries:
+            self.factorial(k)
+            return self._product(n - k, n) * self.inv_fact[k] % p
+        return self.factorial(n) * pow(self.factorial(k) * self.factorial(n - k), -1, p) % p
+
+    def perm(self, n, k):
+        if k < 0 or k > n:
+            return 0
+        if k >= self.p:
+            return 0 #k consecutive integers include a multiple of p
+        if self.max_entries < n < self.p:
+            #past the tables: the k top factors, or n! / (n - k)!
+            if k <= n - k:
+                return self._product(n - k, n)
+            return self.factorial(n) * pow(self.factorial(n - k), -1, self.p) % self.p
+        return self.binom(n, k) * self.factorial(k) % self.p
+
+# shared by the functions below, so every caller reuses the same tables
+cached_factorial = FactorialMemo()
+_mod_tables = OrderedDict()
+
+def mod_table(p, size=1000):
+
+    """
+    Return the ModularFactorials for modulus p, built on first use. At most
+    MOD_TABLES_MAX tables are kept, the least recently used is dropped.
+    """
+
+    table = _mod_tables.get(p)
+    if table is None:
+        table = _mod_tables[p] = ModularFactorials(p, size)
+        if len(_mod_tables) > MOD_TABLES_MAX:
+            _mod_tables.popitem(last=False)
+    elif size >= len(table.fact):
+        table.grow(size)
+    _mod_tables.move_to_end(p)
+    return table
+
+def binom(n, k, mod=None):
+
+    """
+    Return n choose k, exactly from the factorial memo, or mod a prime
+    from precomputed tables when mod is given.
+    """
+
+    if mod is not None:
+        return mod_table(mod, 0).binom(n, k)
+    if k < 0 or k > n:
+        return 0
+    small = cached_factorial.small(n)
+    if small is not None:
+        #all three factorials are in the never evicted table
+        return small[n] // (small[k] * small[n - k])
+    #falling product of the top k factors over k!, the smaller side
+    #only, so (n - k)! is never built after n!
+    k = min(k, n - k)
+    return product_range(n - k, n) // cached_factorial(k)
+
+def perm(n, k, mod=None):
+
+    """
+    Return the number of ordered choices of k from n, n! / (n - k)!,
+    exactly or mod a prime like binom.
+    """
+
+    if mod is not None:
+        return mod_table(mod, 0).perm(n, k)
+    if k < 0 or k > n:
+        return 0
+    small = cached_factorial.small(n)
+    if small is not None:
+        return small[n] // small[n - k]
+    #falling product of the top k factors, (n - k)! is never built
+    return product_range(n - k, n)
+
+def combinatorics_cases(calls=10 ** 5, max_n=(100, 1000), mod=10 ** 9 + 7, history=HISTORY_PATH):
+
+    """
+    Time many binomials of small random n (up to each value of max_n):
+    math.comb, exact binom from the factorial memo and binom mod a prime
+    from the tables. Times are per call, timings are appended to the
+    benchmark history (None to skip).
+    """
+
+    results = []
+    recorded = []
+    for top in max_n:
+        pairs = [(n, random.randint(0, n)) for n in
+                 (random.randint(0, top) for _ in range(calls))]
+        assert all(binom(n, k) == math.comb(n, k) and binom(n, k, mod) == math.comb(n, k) % mod
+                   for n, k in pairs[:1000])
+        workloads = {
+            "math.comb": lambda: [math.comb(n, k) for n, k in pairs],
+            "memo binom": lambda: [binom(n, k) for n, k in pairs],
+            "modular binom": lambda: [binom(n, k, mod) for n, k in pairs]
+        }
+        row = {"calls": calls, "max n": top}
+        for name, workload in workloads.items():
+            stats = benchmark(workload)
+            row[f"{name} time per call(seconds)"] = stats.median / calls
+            recorded.append(({"algorithm": name, "max n": top}, stats.samples))
+        results.append(row)
+    if history is not None:
+        record("combinatorics", recorded, history)
+    return pd.DataFrame(results).to_string(index=False)
+
+def factorial_cases(sizes=FACTORIAL_SIZES, workers=2, max_n=10 ** 7, history=HISTORY_PATH):
+
+    """
+    Time recursive, iterative, binary splitting (serial and with a process
+    pool of the given size), prime swing and math.factorial for each n in
+    sizes up to max_n. The full range to 10^7 takes hours, pass a smaller
+    max_n for a quick run. Recursive and iterative are skipped above their
+    MAX_N, the table marks those cells and says why. Results are checked
+    against math.factorial, timings are appended to the benchmark history
+    (None to skip).
+    """
+
+    algorithms = {
+        "recursive": recursive_factorial,
+        "iterative": iterative_factorial,
+        "binary split": binary_split_factorial,
+        f"binary split {workers} workers": lambda n: binary_split_factorial(n, workers),
+        "prime swing": prime_swing_factorial,
+        "math.factorial": math.factorial
+    }
+    results = []
+    recorded = []
+    for n in sizes:
+        if n > max_n:
+            continue
+        expected = math.factorial(n)
+        row = {"n": n, "result bits": expected.bit_length()}
+        for name, func in algorithms.items():
+            if n > MAX_N.get(name, n):
+                row[f"{name} time(seconds)"] = "skipped"
+                continue
+            assert func(n) == expected, name
+            #one timed trial is enough once a call takes seconds
+            long_run = {"repeat": 1, "number": 1, "warmup": 0} if n >= 10 ** 6 else {}
+            stats = benchmark(func, lambda: (n,), **long_run)
+            row[f"{name} time(seconds)"] = stats.median
+            recorded.append(({"algorithm": name, "n": n}, stats.samples))
+        results.append(row)
+    if history is not None:
+        record("factorial", recorded, history)
+    table = pd.DataFrame(results).to_string(index=False)
+    skipped = [f"{name} above n = {limit}" for name, limit in MAX_N.items()
+               if any(row["n"] > limit for row in results)]
+    if skipped:
+        table += ("\nskipped: " + ", ".join(skipped)
+                  + " (recursion limit and quadratic time)")
+    return table
+
+if __name__ == '__main__':
 
-n = int(input("Input an integer to calculate the factorial: "))
-print(f"Using recursion the factorial of {n} is {recursive_factorial(n)}.")
-print(f"Using iteration the factorial of {n} is still {iterative_factorial(n)}.")
\ No newline at end of file
+    print("Comparing factorial algorithms as n grows to 10^7 (takes hours):")
+    print(factorial_cases())
+    print("Repeated binomials from memo and modular tables:")
+    print(combinatorics_cases())
+    n = int(input("Input an integer to calculate the factorial: "))
+    print(f"Using recursion the factorial of {n} is {recursive_factorial(n)}.")
+    print(f"Using iteration the factorial of {n} is still {iterative_factorial(n)}.")
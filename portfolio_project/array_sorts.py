@@ -0,0 +1,264 @@
+"""
+Vectorized sorts for integer buffers.
+
+This module provides sorts that work directly on NumPy arrays and
+array.array buffers so the values are never boxed into Python ints:
+
+- radix_sort_array: LSD radix sort using bincount/cumsum histograms
+- counting_sort_array: counting sort for buffers with a small key range
+- sort_buffer: picks counting or radix sort based on the key range
+- is_buffer: checks if an input should take this path
+- sort_workspace: memory sort_buffer needs on top of the buffer
+
+All sorts are in place, the caller's buffer holds the result.
+"""
+
+from array import array
+from typing import Tuple
+
+import numpy as np
+
+from function_timer import timer
+
+# number of key bits handled by each radix pass (16 buckets per pass)
+RADIX_BITS = 4
+# use counting sort when the key range is at most this many times n
+COUNTING_RANGE_FACTOR = 2
+# widest key range counted, 2^27 counts take 1 GB, wider ranges are radix sorted
+COUNTING_MAX_RANGE = 1 << 27
+# keys ranked per block when placing a radix pass, bounds the one hot table
+SCATTER_BLOCK = 1 << 12
+
+
+def is_buffer(arr) -> bool:
+    """Check if arr is an integer buffer that can be sorted in place.
+
+    Lists are not buffers, array.array, NumPy arrays and any other
+    writable object supporting the buffer protocol are.
+
+    Args:
+        arr: object to check
+
+    Returns:
+        bool: True if arr exposes a writable, one dimensional integer buffer
+    """
+    if isinstance(arr, np.ndarray):
+        return arr.ndim == 1 and arr.dtype.kind in "iu"
+    try:
+        view = memoryview(arr)
+    except TypeError:
+        return False
+    try:
+        kind = np.dtype(view.format).kind
+    except TypeError: #formats NumPy has no dtype for, array('u') ...
+        return False
+    return not view.readonly and view.ndim == 1 and kind in "iu"
+
+
+def as_ndarray(buf) -> np.ndarray:
+    """Return a NumPy view sharing memory with buf, no copy is made.
+
+    Args:
+        buf: NumPy array, array.array or other integer buffer
+
+    Returns:
+        np.ndarray: one dimensional view over the same memory
+    """
+    if isinstance(buf, np.ndarray):
+        return buf
+    return np.asarray(memoryview(buf))
+
+
+def as_unsigned(view: np.ndarray) -> np.ndarray:
+    """Return view read as unsigned integers of the same width, no copy.
+
+    Subtracting the minimum key in unsigned arithmetic wraps to the right
+    offset for every key, even when the range does not fit the signed
+    type (int8 keys -100 and 100, uint64 keys above 2^63).
+
+    Args:
+        view (np.ndarray): integer keys
+
+    Returns:
+        np.ndarray: unsigned view over the same memory
+    """
+    if view.dtype.kind == "u":
+        return view
+    return view.view(view.dtype.str.replace("i", "u"))
+
+
+def key_range(view: np.ndarray) -> Tuple[int, int]:
+    """Find the smallest and largest key in a buffer.
+
+    Args:
+        view (np.ndarray): integer keys
+
+    Returns:
+        Tuple[int, int]: (min, max) of the keys
+    """
+    return int(view.min()), int(view.max())
+
+
+@timer #wrapper
+def counting_sort_array(buf) -> None:
+    """Sort an integer buffer in place with counting sort.
+
+    Build a histogram of the keys with np.bincount then write each key
+    back as many times as it was counted. Runs in O(n + k) where k is
+    max - min + 1, only use when k is small. Ranges of COUNTING_MAX_RANGE
+    or more would not fit a histogram and go to radix_sort_array.
+
+    Args:
+        buf: NumPy array or array.array of integers, modified in place
+
+    Returns:
+        None
+    """
+    view = as_ndarray(buf)
+    if len(view) < 2:
+        return
+    low, high = key_range(view)
+    if high - low >= COUNTING_MAX_RANGE:
+        radix_sort_array(view)
+        return
+    keys = as_unsigned(view)
+    low_key = keys.dtype.type(low % (1 << 8 * keys.itemsize))
+    # shift keys so smallest key counts at index 0, in unsigned arithmetic
+    counts = np.bincount((keys - low_key).astype(np.intp),
+                         minlength=high - low + 1)
+    keys[:] = np.repeat(np.arange(high - low + 1, dtype=keys.dtype), counts)
+    keys += low_key
+
+
+@timer #wrapper
+def radix_sort_array(buf) -> None:
+    """Sort an integer buffer in place with LSD radix sort.
+
+    Keys are shifted by the minimum in place, in unsigned arithmetic, so
+    negatives sort as unsigned. Each pass of RADIX_BITS bits counts digits
+    with np.bincount and turns the counts into bucket offsets with
+    np.cumsum. Every key's slot is its bucket offset plus the number of
+    equal digits before it, counted a block at a time, and all keys are
+    scattered in one assignment. Counting in input order keeps each pass
+    stable without an argsort. Keys move between the buffer and one
+    scratch array, and only as many passes as the key range needs are run.
+
+    Args:
+        buf: NumPy array or array.array of integers, modified in place
+
+    Returns:
+        None
+    """
+    view = as_ndarray(buf)
+    n = len(view)
+    if n < 2:
+        return
+    low, high = key_range(view)
+    span = high - low
+    if span == 0:
+        return
+
+    keys = as_unsigned(view)
+    low_key = keys.dtype.type(low % (1 << 8 * keys.itemsize))
+    keys -= low_key
+    scratch = np.empty_like(keys)
+    digits = np.empty(n, dtype=np.intp)
+    slots = np.empty(n, dtype=np.intp)
+    buckets = 1 << RADIX_BITS
+    bucket_ids = np.arange(buckets, dtype=np.intp)[:, None]
+    mask = keys.dtype.type(buckets - 1)
+
+    shift = 0
+    while span >> shift:
+        # scratch is free until the scatter, digits are worked out in it
+        np.right_shift(keys, keys.dtype.type(shift), out=scratch)
+        np.bitwise_and(scratch, mask, out=scratch)
+        digits[:] = scratch
+        counts = np.bincount(digits, minlength=buckets)
+        # next free slot of each bucket, moved on block by block
+        free = np.cumsum(counts) - counts
+        for start in range(0, n, SCATTER_BLOCK):
+            block = digits[start:start + SCATTER_BLOCK]
+            # seen[d, i]: keys with digit d among the block's first i + 1
+            seen = np.cumsum(bucket_ids == block, axis=1, dtype=np.int32)
+            slots[start:start + len(block)] = free[block] + seen[block, np.arange(len(block))] - 1
+            free += seen[:, -1]
+        scratch[slots] = keys
+        keys, scratch = scratch, keys
+        shift += RADIX_BITS
+
+    keys += low_key
+    if not np.shares_memory(keys, view):
+        as_unsigned(view)[:] = keys
+
+
+def sort_workspace(itemsize: int) -> Tuple[int, int]:
+    """Bound the memory sort_buffer allocates on top of the buffer.
+
+    Radix sort holds a scratch copy of the keys, their digits and their
+    slots, plus the per block tables. Counting sort holds the shifted
+    keys, the counts and the sorted output, so it costs the most per key
+    when the key range is at its limit.
+
+    Args:
+        itemsize (int): bytes per key
+
+    Returns:
+        Tuple[int, int]: (bytes per key, fixed bytes), n keys need at
+            most n * per_key + fixed bytes besides the buffer itself
+    """
+    intp = np.dtype(np.intp).itemsize
+    radix = itemsize + 2 * intp
+    counting = (COUNTING_RANGE_FACTOR + 1) * itemsize + COUNTING_RANGE_FACTOR * intp
+    # one hot block, its int32 running counts and the block sized gathers
+    fixed = SCATTER_BLOCK * ((1 << RADIX_BITS) * 5 + 6 * intp)
+    return max(radix, counting), fixed
+
+
+def sort_buffer(buf, reverse: bool = False) -> None:
+    """Sort an integer buffer in place with the best vectorized sort.
+
+    Counting sort is used when the key range is small compared with
+    the number of elements and below COUNTING_MAX_RANGE, otherwise radix
+    sort.
+
+    Args:
+        buf: NumPy array or array.array of integers, modified in place
+        reverse (bool): sort descending
+
+    Returns:
+        None
+    """
+    view = as_ndarray(buf)
+    if len(view) < 2:
+        return
+    low, high = key_range(view)
+    if high - low < min(COUNTING_RANGE_FACTOR * len(view), COUNTING_MAX_RANGE):
+        counting_sort_array(view)
+    else:
+        radix_sort_array(view)
+    if reverse:
+        view[:] = view[::-1].copy()
+
+
+if __name__ == '__main__':
+    import random
+
+    test_array = array('q', random.sample(range(-9999, 9999), 500))
+    expected = sorted(test_array)
+    radix_sort_array(test_array)
+    assert list(test_array) == expected, "radix_sort_array failed"
+
+    test_np = np.array(random.choices(range(-50, 50), k=500))
+    expected = sorted(test_np.tolist())
+    counting_sort_array(test_np)
+    assert test_np.tolist() == expected, "counting_sort_array failed"
+    print("All test passed buffers sorted in place\n")
+
+    for size in [10_000, 100_000, 1_000_000]:
+        data = np.random.randint(-2**40, 2**40, size=size)
+        radix_sort_array(data)
+        print(f"Radix sort of {size} keys took {radix_sort_array.last_run:.6f} seconds.")
+        data = np.random.randint(0, 2 * size, size=size)
+        counting_sort_array(data)
+        print(f"Counting sort of {size} keys took {counting_sort_array.last_run:.6f} seconds.")
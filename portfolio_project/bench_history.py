@@ -0,0 +1,323 @@
+"""
+Benchmark result history and performance regression gate.
+
+- record: append benchmark samples to the history file (JSON lines)
+- environment: git revision, Python version, CPU and timestamp tags
+- load: read every entry back
+- compare: flag cases that got significantly slower than a baseline
+
+Every line of the history file is one benchmark case from one run:
+
+    {"suite": "sort", "case": {"algorithm": "Merge", "size": 100, ...},
+     "samples": [...], "median": ..., "revision": "...", "dirty": false,
+     "python": "3.11.7", "cpu": "...", "cpu_count": 8,
+     "timestamp": "2024-01-01T00:00:00+00:00"}
+
+Run as a script to gate a merge, exit status is 1 when any case slowed
+down significantly:
+
+    python bench_history.py compare <baseline revision> [<revision>] [--dirty]
+    python bench_history.py revisions
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# default history file, shared by every benchmark runner
+HISTORY_PATH = Path(__file__).resolve().parent / "bench_history.jsonl"
+# significance level of the slowdown test
+DEFAULT_ALPHA = 0.05
+# medians must also grow by at least this fraction to count as slower
+DEFAULT_MIN_SLOWDOWN = 0.05
+# tags that must match for two runs to be compared, timings from
+# different machines or interpreters differ without any code change
+COMPARED_ENVIRONMENT = ("python", "implementation", "cpu", "cpu_count")
+
+
+def _git(*args: str) -> Optional[str]:
+    """Run a git command in this checkout, None if git is unavailable."""
+    try:
+        out = subprocess.run(["git", *args], cwd=Path(__file__).resolve().parent,
+                             capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _cpu_name() -> str:
+    """Processor model name, platform.processor() is often empty on Linux."""
+    try:
+        with open("/proc/cpuinfo") as info:
+            for line in info:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+@lru_cache(maxsize=None)
+def _static_environment() -> Tuple[Tuple[str, object], ...]:
+    """Tags that do not change while the process runs."""
+    return (
+        ("revision", _git("rev-parse", "HEAD")),
+        ("dirty", bool(_git("status", "--porcelain", "--untracked-files=no"))),
+        ("python", platform.python_version()),
+        ("implementation", platform.python_implementation()),
+        ("platform", platform.platform()),
+        ("cpu", _cpu_name()),
+        ("cpu_count", os.cpu_count()),
+    )
+
+
+def environment() -> dict:
+    """
+    Describe where and when a benchmark ran.
+
+    Returns:
+        dict: git revision (None outside a checkout), whether the tree
+            had uncommitted changes, Python version and implementation,
+            platform, CPU model and count, and an ISO 8601 UTC timestamp
+    """
+    env = dict(_static_environment())
+    env["timestamp"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    return env
+
+
+def record(suite: str, entries: Iterable[Tuple[dict, Sequence[float]]],
+           path: Optional[os.PathLike] = None) -> None:
+    """
+    Append benchmark cases to the history file.
+
+    Args:
+        suite (str): name of the benchmark runner, e.g. 'sort'
+        entries (Iterable[Tuple[dict, Sequence[float]]]): (case, samples)
+            pairs, case holds the parameters that identify the measurement
+            (algorithm, size, ...) and samples the per call seconds of
+            each trial, e.g. BenchmarkResult.samples
+        path (PathLike, optional): history file. Defaults to HISTORY_PATH
+
+    Returns:
+        None
+    """
+    env = environment()
+    lines = []
+    for case, samples in entries:
+        samples = [float(s) for s in samples]
+        lines.append(json.dumps({"suite": suite, "case": case, "samples": samples,
+                                 "median": statistics.median(samples), **env},
+                                default=str))
+    with open(path or HISTORY_PATH, "a") as out:
+        for line in lines:
+            out.write(line + "\n")
+
+
+def load(path: Optional[os.PathLike] = None) -> List[dict]:
+    """
+    Read every entry of the history file.
+
+    Args:
+        path (PathLike, optional): history file. Defaults to HISTORY_PATH
+
+    Returns:
+        List[dict]: entries in the order they were recorded, empty if the
+            file does not exist
+    """
+    try:
+        with open(path or HISTORY_PATH) as src:
+            return [json.loads(line) for line in src if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def mann_whitney_greater(current: Sequence[float],
+                         baseline: Sequence[float]) -> float:
+    """
+    One sided Mann-Whitney U test that current tends to be larger.
+
+    Uses the normal approximation with tie and continuity corrections,
+    so it needs no assumption about how timings are distributed.
+
+    Args:
+        current (Sequence[float]): samples that may have slowed down
+        baseline (Sequence[float]): reference samples
+
+    Returns:
+        float: p-value, small values mean current is significantly larger
+    """
+    n1, n2 = len(current), len(baseline)
+    if not n1 or not n2:
+        return 1.0
+    pooled = sorted([(v, 0) for v in current] + [(v, 1) for v in baseline])
+    #average ranks over runs of tied values
+    rank_sum = 0.0
+    tie_term = 0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        rank_sum += rank * sum(1 for _, group in pooled[i:j + 1] if group == 0)
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0 #every sample equal
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 1 - statistics.NormalDist().cdf(z)
+
+
+def _match(entry: dict, revision: str) -> bool:
+    """True if entry was recorded at revision (full hash or a prefix)."""
+    return (entry.get("revision") or "").startswith(revision)
+
+
+def _group(entries: List[dict]) -> Dict[Tuple[str, str, str], List[float]]:
+    """Pool the samples of every run of the same suite and case on the
+    same machine and Python."""
+    groups: Dict[Tuple[str, str, str], List[float]] = {}
+    for entry in entries:
+        env = ", ".join(str(entry.get(tag)) for tag in COMPARED_ENVIRONMENT)
+        key = (entry["suite"], json.dumps(entry["case"], sort_keys=True), env)
+        groups.setdefault(key, []).extend(entry["samples"])
+    return groups
+
+
+def compare(baseline: str, current: Optional[str] = None,
+            path: Optional[os.PathLike] = None, alpha: float = DEFAULT_ALPHA,
+            min_slowdown: float = DEFAULT_MIN_SLOWDOWN,
+            dirty: bool = False) -> List[dict]:
+    """
+    Compare every case measured at both revisions.
+
+    A case is a regression when the Mann-Whitney test finds the current
+    samples significantly larger (Holm corrected over all cases, so many
+    cases do not produce false alarms) and its median grew by at least
+    min_slowdown. Runs are only compared with runs on the same Python
+    and CPU (COMPARED_ENVIRONMENT). Baseline runs from trees with
+    uncommitted changes are left out, they did not measure the revision.
+
+    Args:
+        baseline (str): baseline git revision or prefix
+        current (str, optional): revision to check. Defaults to the
+            checked out revision
+        path (PathLike, optional): history file. Defaults to HISTORY_PATH
+        alpha (float): family wide significance level
+        min_slowdown (float): smallest median growth reported, 0.05 = 5%
+        dirty (bool): compare the current revision's runs with
+            uncommitted changes (work in progress) instead of its clean
+            runs
+
+    Raises:
+        ValueError: If a revision is empty, or current is not given and
+            git cannot tell the checked out revision.
+
+    Returns:
+        List[dict]: one row per common case and environment with suite,
+            case, environment, both medians, their ratio, the p-value and
+            a Regression flag, slowest ratio first
+    """
+    current = current or dict(_static_environment())["revision"]
+    if not baseline or not current:
+        #an empty prefix would match every entry in the history
+        raise ValueError("baseline and current revision are required, "
+                         "git could not tell the checked out revision")
+    entries = load(path)
+    before = _group([e for e in entries
+                     if _match(e, baseline) and not e.get("dirty")])
+    after = _group([e for e in entries
+                    if _match(e, current) and bool(e.get("dirty")) == dirty])
+    rows = []
+    for key in before.keys() & after.keys():
+        old, new = before[key], after[key]
+        old_median, new_median = statistics.median(old), statistics.median(new)
+        rows.append({
+            "Suite": key[0],
+            "Case": key[1],
+            "Environment": key[2],
+            "Baseline": old_median,
+            "Current": new_median,
+            "Ratio": new_median / old_median if old_median else math.inf,
+            "p-value": mann_whitney_greater(new, old),
+            "Regression": False
+        })
+    #Holm step down: smallest p-values must beat the strictest thresholds
+    for rank, row in enumerate(sorted(rows, key=lambda r: r["p-value"])):
+        if row["p-value"] > alpha / (len(rows) - rank):
+            break
+        row["Regression"] = row["Ratio"] >= 1 + min_slowdown
+    return sorted(rows, key=lambda r: r["Ratio"], reverse=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+
+    Args:
+        argv (List[str], optional): arguments. Defaults to sys.argv[1:]
+
+    Returns:
+        int: 0 when no case slowed down, 1 when any did, 2 when the two
+            revisions have no case in common on the same environment or
+            a revision is missing
+    """
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--history", default=HISTORY_PATH,
+                        help="history file (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    cmp_parser = commands.add_parser("compare", help="flag slowdowns against a baseline")
+    cmp_parser.add_argument("baseline", help="baseline git revision or prefix")
+    cmp_parser.add_argument("current", nargs="?",
+                            help="revision to check (default: checked out revision)")
+    cmp_parser.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    cmp_parser.add_argument("--min-slowdown", type=float, default=DEFAULT_MIN_SLOWDOWN)
+    cmp_parser.add_argument("--dirty", action="store_true",
+                            help="check runs made with uncommitted changes")
+    commands.add_parser("revisions", help="list recorded revisions")
+    args = parser.parse_args(argv)
+
+    if args.command == "revisions":
+        runs: Dict[str, dict] = {}
+        for entry in load(args.history):
+            run = runs.setdefault(entry.get("revision") or "unknown",
+                                  {"Revision": entry.get("revision") or "unknown",
+                                   "First": entry["timestamp"], "Cases": 0,
+                                   "Python": entry["python"], "CPU": entry["cpu"]})
+            run["Last"] = entry["timestamp"]
+            run["Cases"] += 1
+        print(pd.DataFrame(list(runs.values())).to_string(index=False)
+              if runs else "no benchmark history recorded")
+        return 0
+
+    try:
+        rows = compare(args.baseline, args.current, args.history,
+                       args.alpha, args.min_slowdown, args.dirty)
+    except ValueError as error:
+        parser.error(str(error))
+    if not rows:
+        print("no benchmark case recorded at both revisions on the same environment")
+        return 2
+    print(pd.DataFrame(rows).to_string(index=False))
+    slower = sum(row["Regression"] for row in rows)
+    print(f"\n{slower} of {len(rows)} cases significantly slower")
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Bloom filter for rejecting lookups of values that are not stored.
+
+This module provides a BloomFilter class: a compact bit array that
+answers "definitely not present" or "maybe present" in k hash steps,
+and guard, which puts a filter in front of any search function so
+definite misses return -1 without searching.
+
+A filter sized for n values and false positive rate p uses
+m = -n ln p / (ln 2)^2 bits and k = m / n ln 2 hash positions per value,
+about 9.6 bits per value for 1%. Values are never missed, a value not
+stored is reported present with probability about p.
+
+Positions come from one 64 bit hash per value split in two,
+h1 + i * h2 for i < k (double hashing). Python's hash is mixed with
+splitmix64 first, it leaves small integers unchanged. hash is used for
+numbers too, it is equal for equal numbers of any type (1, 1.0 and
+Fraction(1)), so none of them is missed.
+"""
+
+import math
+from functools import wraps
+from typing import Callable, Iterable, Iterator
+
+# false positive rate used when none is given
+DEFAULT_ERROR_RATE = 0.01
+
+_MASK64 = (1 << 64) - 1
+
+
+def _hash64(value) -> int:
+    """Well mixed 64 bit hash of value (splitmix64 finalizer)."""
+    z = hash(value)
+    z = (z + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+class BloomFilter:
+    """
+    Set membership filter with no false negatives.
+
+    Provides add and membership (might_contain / in) in O(k), sized
+    once for an expected number of values and false positive rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = DEFAULT_ERROR_RATE) -> None:
+        """
+        Initialize an empty filter.
+
+        Args:
+            capacity (int): number of values the filter is sized for,
+                adding more raises the false positive rate
+            error_rate (float): false positive rate at capacity, 0 < p < 1
+
+        Raises:
+            ValueError: If error_rate is not between 0 and 1.
+
+        Returns:
+            None
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    @classmethod
+    def from_values(cls, values: Iterable,
+                    error_rate: float = DEFAULT_ERROR_RATE) -> "BloomFilter":
+        """
+        Build a filter sized for values in one pass.
+
+        Args:
+            values (Iterable): values to store, a sized collection is
+                read once, anything else is copied to a list first
+            error_rate (float): false positive rate
+
+        Returns:
+            BloomFilter: filter holding every value
+        """
+        if not hasattr(values, '__len__'):
+            values = list(values)
+        bloom = cls(len(values), error_rate)
+        bits = bloom._bits
+        for value in values:
+            for position in bloom._positions(value):
+                bits[position >> 3] |= 1 << (position & 7)
+        bloom._count = len(values)
+        return bloom
+
+    def _positions(self, value) -> Iterator[int]:
+        """The k bit positions of value."""
+        h = _hash64(value)
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1 #odd, so positions do not repeat when m is even
+        m = self.num_bits
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % m
+
+    def add(self, value) -> None:
+        """
+        Store value.
+
+        Args:
+            value: hashable value
+
+        Returns:
+            None
+        """
+        bits = self._bits
+        for position in self._positions(value):
+            bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def might_contain(self, value) -> bool:
+        """
+        Check value against the filter.
+
+        Args:
+            value: hashable value
+
+        Returns:
+            bool: False if value was definitely never added, True if it
+                may have been
+        """
+        #_positions inlined, this is the hot path of every guarded lookup
+        h = _hash64(value)
+        h1 = h & 0xFFFFFFFF
+        h2 = (h >> 32) | 1
+        m = self.num_bits
+        bits = self._bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % m
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    __contains__ = might_contain
+
+    def expected_error_rate(self) -> float:
+        """False positive rate predicted for the values added so far."""
+        return (1 - math.exp(-self.num_hashes * self._count / self.num_bits)) ** self.num_hashes
+
+    def measure_error_rate(self, misses: Iterable) -> float:
+        """
+        Measure the false positive rate on values known to be absent.
+
+        Args:
+            misses (Iterable): values that were never added
+
+        Returns:
+            float: fraction of misses the filter reports as present
+        """
+        tested = passed = 0
+        for value in misses:
+            tested += 1
+            passed += self.might_contain(value)
+        return passed / tested if tested else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the bit array."""
+        return len(self._bits)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __repr__(self) -> str:
+        return (f"BloomFilter(values={self._count}, bits={self.num_bits}, "
+                f"hashes={self.num_hashes}, bytes={self.nbytes})")
+
+
+def guard(search: Callable, bloom: BloomFilter) -> Callable:
+    """
+    Put a Bloom filter in front of a search function.
+
+    Works with any search taking the key as its last positional argument
+    and returning -1 on a miss: linear_search(arr, key),
+    binary_search(arr, key), SortedIndex.find(key), ...
+
+    Args:
+        search (Callable): search to guard, over the values in bloom
+        bloom (BloomFilter): filter built from the searched values
+
+    Returns:
+        Callable: same signature as search, returns -1 without calling
+            search when the filter rules the key out
+    """
+    @wraps(search)
+    def guarded(*args):
+        if not bloom.might_contain(args[-1]):
+            return -1
+        return search(*args)
+    guarded.bloom = bloom
+    return guarded
@@ -0,0 +1,205 @@
+"""
+Empirical complexity fitting for benchmark results.
+
+- fit: find the complexity model that best explains times measured at
+  several sizes, and its constant factor
+- predict: extrapolate a fitted model to a larger size
+- fit_frame: fit every series of a benchmark DataFrame, predict the
+  production sizes and flag series that scale unlike their expected class
+
+Models are fitted as time = a + c * f(n): a is the fixed per call
+overhead that dominates tiny inputs, c the constant factor. The fit
+minimizes relative error, so every size weighs the same whether it took
+microseconds or minutes. Sizes are plain numbers (n) or (V, E) pairs
+for graphs.
+"""
+
+import math
+import statistics
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import pandas as pd
+
+# candidate models for sizes given as one number n
+MODELS: Dict[str, Callable[[float], float]] = {
+    'log n': lambda n: math.log2(n),
+    'n': lambda n: n,
+    'n log n': lambda n: n * math.log2(n),
+    'n^2': lambda n: n * n,
+}
+# candidate models for graph sizes given as (V, E)
+GRAPH_MODELS: Dict[str, Callable[[float, float], float]] = {
+    'V + E': lambda v, e: v + e,
+    '(V + E) log V': lambda v, e: (v + e) * math.log2(v),
+    'V^2': lambda v, e: v * v,
+    'V * E': lambda v, e: v * e,
+}
+# sizes predicted by fit_frame unless told otherwise
+PRODUCTION_SIZES = (10**6, 10**8)
+# the expected model must fit this many times worse than the best one
+# before a series is flagged, so noise between close models is ignored
+DEVIATION_FACTOR = 2.0
+# relative fit errors below this are timing noise, not a better model
+MIN_FIT_ERROR = 0.1
+
+
+class ComplexityFit(NamedTuple):
+    """Best model for one series of (size, time) measurements."""
+    model: str              # name of the model in MODELS or GRAPH_MODELS
+    constant: float         # seconds per unit of the model, c in a + c * f(n)
+    overhead: float         # fixed seconds per call, a in a + c * f(n)
+    error: float            # root mean square relative error, 0 is a perfect fit
+    exponent: Optional[float]   # slope of log time over log n, None for graphs
+    errors: Dict[str, float]    # error of every candidate model
+
+
+def _model_value(model: str, size) -> float:
+    """f(size) for a named model, size is n or (V, E)."""
+    if isinstance(size, tuple):
+        return GRAPH_MODELS[model](*size)
+    return MODELS[model](size)
+
+
+def _weighted_fit(values: Sequence[float], times: Sequence[float]):
+    """Least squares a >= 0, c > 0 for t = a + c * f with relative errors,
+    returns (c, a, RMS relative error)."""
+    #weighted normal equations, each residual divided by its time
+    w = [1 / (t * t) for t in times]
+    s_1 = sum(w)
+    s_f = sum(wi * f for wi, f in zip(w, values))
+    s_ff = sum(wi * f * f for wi, f in zip(w, values))
+    s_t = sum(wi * t for wi, t in zip(w, times))
+    s_ft = sum(wi * f * t for wi, f, t in zip(w, values, times))
+    det = s_1 * s_ff - s_f * s_f
+    overhead = (s_t * s_ff - s_ft * s_f) / det if det else -1.0
+    constant = (s_1 * s_ft - s_f * s_t) / det if det else -1.0
+    if overhead < 0 or constant <= 0:
+        #no room for an overhead term, fit the model through the origin
+        overhead, constant = 0.0, s_ft / s_ff
+    error = math.sqrt(statistics.fmean([((overhead + constant * f - t) / t) ** 2
+                                        for f, t in zip(values, times)]))
+    return constant, overhead, error
+
+
+def fit(sizes: Sequence, times: Sequence[float],
+        models: Optional[Iterable[str]] = None) -> ComplexityFit:
+    """
+    Fit time = a + c * f(n) for every candidate model and keep the best.
+
+    Args:
+        sizes (Sequence): problem sizes, numbers or (V, E) tuples
+        times (Sequence[float]): seconds measured at each size, > 0
+        models (Iterable[str], optional): candidate model names. Defaults
+            to every model in MODELS, or GRAPH_MODELS for (V, E) sizes
+
+    Raises:
+        ValueError: If fewer than two distinct sizes are left once times
+            <= 0 and sizes n <= 1 (V <= 1 for graphs) are left out.
+
+    Returns:
+        ComplexityFit: best model, constant, overhead, errors and
+            log-log slope
+    """
+    graph = bool(len(sizes)) and isinstance(sizes[0], tuple)
+    if models is None:
+        models = GRAPH_MODELS if graph else MODELS
+    #log n is 0 at n = 1, leave such sizes out rather than divide by zero
+    points = [(s, t) for s, t in zip(sizes, times)
+              if t > 0 and (s[0] if graph else s) > 1]
+    if len({s for s, _ in points}) < 2:
+        raise ValueError("fitting needs at least two distinct sizes > 1 "
+                         "with times > 0")
+    fits = {}
+    for model in models:
+        values = [_model_value(model, s) for s, _ in points]
+        fits[model] = _weighted_fit(values, [t for _, t in points])
+    best = min(fits, key=lambda m: fits[m][2])
+    exponent = None
+    if not graph:
+        log_n = [math.log(s) for s, _ in points]
+        log_t = [math.log(t) for _, t in points]
+        exponent = statistics.linear_regression(log_n, log_t).slope
+    constant, overhead, error = fits[best]
+    return ComplexityFit(best, constant, overhead, error, exponent,
+                         {m: e for m, (_, _, e) in fits.items()})
+
+
+def predict(result: ComplexityFit, size) -> float:
+    """
+    Predict seconds at a size from a fitted model.
+
+    Args:
+        result (ComplexityFit): fit returned by fit
+        size: n, or (V, E) for graph models
+
+    Returns:
+        float: predicted seconds
+    """
+    return result.overhead + result.constant * _model_value(result.model, size)
+
+
+def fit_frame(df: pd.DataFrame, group_columns: List[str],
+              size_column: str = 'Size', time_column: str = 'Time',
+              expected: Optional[Callable[[tuple], Optional[str]]] = None,
+              production_sizes: Sequence = PRODUCTION_SIZES) -> pd.DataFrame:
+    """
+    Fit a complexity model to every series of a benchmark table.
+
+    Args:
+        df (Pandas DataFrame): one row per measurement
+        group_columns (List[str]): columns identifying a series, e.g.
+            ['Algorithm', 'Test Types:']
+        size_column (str): column holding n or (V, E)
+        time_column (str): column holding seconds
+        expected (Callable, optional): given a series' group values as a
+            tuple, returns the model it should follow, or None if unknown
+        production_sizes (Sequence): sizes to predict seconds at
+
+    Returns:
+        df (Pandas DataFrame): one row per series with the group columns
+            and:
+            Best Fit - model that explains the times best
+            Constant - seconds per unit of the best model
+            Overhead - fixed seconds per call
+            Fit Error - RMS relative error of the best model
+            Exponent - log-log slope, ~1 linear, ~2 quadratic
+            Expected - model the series should follow
+            Predicted n=... - seconds at each production size (V, E
+                for graph sizes)
+            Warning - set when the series does not scale as expected,
+                or could not be fitted
+    """
+    rows = []
+    for group, series in df.groupby(group_columns, sort=True):
+        group = group if isinstance(group, tuple) else (group,)
+        series = series.groupby(size_column, sort=True)[time_column].median()
+        row = dict(zip(group_columns, group))
+        try:
+            result = fit(list(series.index), list(series.values))
+        except ValueError as error:
+            #too few usable points, report the series without a fit
+            row['Warning'] = str(error)
+            rows.append(row)
+            continue
+        row.update({
+            'Best Fit': result.model,
+            'Constant': result.constant,
+            'Overhead': result.overhead,
+            'Fit Error': result.error,
+            'Exponent': result.exponent,
+        })
+        want = expected(group) if expected is not None else None
+        row['Expected'] = want
+        for size in production_sizes:
+            label = 'V, E' if isinstance(size, tuple) else 'n'
+            row[f'Predicted {label}={size}'] = predict(result, size)
+        row['Warning'] = ''
+        if (want is not None and want != result.model and want in result.errors
+                and result.errors[want] > DEVIATION_FACTOR * max(result.error, MIN_FIT_ERROR)):
+            row['Warning'] = f'scales like {result.model}, expected {want}'
+        rows.append(row)
+    frame = pd.DataFrame(rows)
+    if 'Warning' in frame:
+        #last, also when the first series could not be fitted
+        frame = frame[[c for c in frame.columns if c != 'Warning'] + ['Warning']]
+    return frame
@@ -0,0 +1,219 @@
+"""
+Sort dispatcher that routes each input to a suitable algorithm.
+
+- smart_sort: profile the input, pick an algorithm and sort in place
+- sort: same as smart_sort without the report
+- profile_input: cheap measurements of order, duplicates and key range
+- choose_algorithm: map an input profile to an algorithm name
+
+Buffer protocol inputs (NumPy arrays, array.array) go to the vectorized
+sorts in array_sorts so their values are never converted to a list.
+Lists are profiled and sent to insertion, natural merge, counting,
+radix, bucket or introsort from sort_algos.
+"""
+
+import operator
+import random
+import time
+from itertools import islice
+from typing import Callable, NamedTuple, Optional
+
+from function_timer import timer
+from sort_algos import (
+    bucket_sort,
+    counting_sort,
+    insertion_sort,
+    intro_sort,
+    key_range,
+    natural_merge_sort,
+    radix_sort,
+)
+
+try:
+    from array_sorts import is_buffer, sort_buffer
+except ImportError: # NumPy not installed
+    is_buffer = None
+    sort_buffer = None
+
+# lists this short always use insertion sort
+INSERTION_MAX_SIZE = 32
+# counting sort when the key range is at most n / COUNTING_RANGE_DIVISOR
+# (measured: radix sort is faster on wider ranges)
+COUNTING_RANGE_DIVISOR = 2
+# ... or when at least this fraction of sampled values repeat and the
+# key range is at most n
+DUPLICATE_RATIO_FOR_COUNTING = 0.5
+# radix sort up to this many key bits, bucket sort for wider integers
+RADIX_MAX_BITS = 64
+# natural merge sort when runs average at least this many elements
+MIN_AVERAGE_RUN = 32
+# number of random pairs / elements sampled for inversions and duplicates
+SAMPLE_SIZE = 64
+
+ALGORITHMS = {
+    'insertion': insertion_sort,
+    'natural merge': natural_merge_sort,
+    'counting': counting_sort,
+    'radix': radix_sort,
+    'bucket': bucket_sort,
+    'intro': intro_sort,
+}
+
+
+class InputProfile(NamedTuple):
+    """Cheap measurements of a list used to pick a sort algorithm."""
+    size: int
+    runs: int                   # ascending or descending runs
+    descents: int               # positions where arr[i + 1] < arr[i]
+    inversion_ratio: float      # sampled fraction of pairs out of order
+    duplicate_ratio: float      # sampled fraction of repeated values
+    key_span: Optional[int]     # max - min + 1, None unless all ints
+
+
+class SortReport(NamedTuple):
+    """Which algorithm smart_sort used and what picking it cost."""
+    algorithm: str
+    detect_time: float          # seconds spent profiling and choosing
+    profile: Optional[InputProfile]
+
+
+def profile_input(arr: list, sample_size: int = SAMPLE_SIZE) -> InputProfile:
+    """Measure how sorted a list already is and the shape of its keys.
+
+    Descents and ascents are counted exactly with C level map passes.
+    Lists already in order stop there, otherwise inversions and
+    duplicates are estimated from random samples and the key range is
+    found for lists where every element is an int.
+
+    Args:
+        arr (list): list to measure, must have at least 2 elements
+        sample_size (int): random pairs / elements to sample
+
+    Returns:
+        InputProfile: the measurements
+    """
+    size = len(arr)
+    descents = sum(map(operator.gt, arr, islice(arr, 1, None)))
+    ascents = sum(map(operator.lt, arr, islice(arr, 1, None)))
+    #a run ends wherever the direction flips
+    runs = min(descents, ascents) + 1
+    if descents == 0 or ascents == 0:
+        #already in order one way or the other, nothing else to measure
+        return InputProfile(size, runs, descents, 0.0 if descents == 0 else 1.0,
+                            0.0, None)
+
+    #compare random pairs (i <= j) with C level maps, no Python loop
+    first = random.choices(range(size), k=sample_size)
+    second = random.choices(range(size), k=sample_size)
+    left = map(arr.__getitem__, map(min, first, second))
+    right = map(arr.__getitem__, map(max, first, second))
+    inversion_ratio = sum(map(operator.gt, left, right)) / sample_size
+
+    #distinct values among a sample drawn without replacement
+    sample = [arr[i] for i in set(first)]
+    try:
+        duplicate_ratio = 1 - len(set(sample)) / len(sample)
+    except TypeError: # unhashable elements
+        duplicate_ratio = 0.0
+
+    key_span = None
+    #integer sorts rebuild the list with slices so only lists qualify
+    if isinstance(arr, list) and set(map(type, arr)) == {int}:
+        low, high = key_range(arr)
+        key_span = high - low + 1
+
+    return InputProfile(size, runs, descents, inversion_ratio,
+                        duplicate_ratio, key_span)
+
+
+def choose_algorithm(profile: InputProfile) -> str:
+    """Pick the sort algorithm expected to be fastest for a profile.
+
+    Args:
+        profile (InputProfile): measurements from profile_input
+
+    Returns:
+        str: key of ALGORITHMS
+    """
+    size = profile.size
+    if size <= INSERTION_MAX_SIZE or profile.descents == 0:
+        return 'insertion'
+    #insertion sort does n + inversions work, fine while that is ~ n log n
+    est_inversions = profile.inversion_ratio * size * (size - 1) / 2
+    if est_inversions <= size * size.bit_length() and profile.descents < size // MIN_AVERAGE_RUN:
+        return 'insertion'
+    if profile.runs <= size // MIN_AVERAGE_RUN:
+        return 'natural merge'
+    if profile.key_span is not None:
+        #many repeats mean few distinct keys, counting sort writes them in runs
+        if (profile.key_span * COUNTING_RANGE_DIVISOR <= size
+                or (profile.duplicate_ratio >= DUPLICATE_RATIO_FOR_COUNTING
+                    and profile.key_span <= size)):
+            return 'counting'
+        if profile.key_span.bit_length() <= RADIX_MAX_BITS:
+            return 'radix'
+        return 'bucket'
+    return 'intro'
+
+
+@timer #wrapper
+def smart_sort(arr, key: Optional[Callable] = None,
+               reverse: bool = False) -> SortReport:
+    """Sort a list or integer buffer in place with the best fitting algorithm.
+
+    Buffers go straight to the vectorized sorts. Lists are profiled
+    (runs, estimated inversions, duplicates, key range) and sorted by
+    the algorithm choose_algorithm picks. With key or reverse the
+    profile is taken of the keys in the order they will be sorted and
+    both are passed on, so the sort is stable.
+
+    Args:
+        arr: list, NumPy array or array.array to be sorted in place
+        key (Callable, optional): function computing each element's
+            sort key, lists only. Defaults to None (compare elements)
+        reverse (bool): sort descending
+
+    Raises:
+        TypeError: If key is given for a buffer input.
+
+    Returns:
+        SortReport: algorithm used, seconds spent choosing it and the
+            input profile (None for buffers and short lists)
+    """
+    start = time.perf_counter()
+    if not isinstance(arr, list) and is_buffer is not None and is_buffer(arr):
+        if key is not None:
+            raise TypeError("key is not supported for buffer inputs")
+        detect_time = time.perf_counter() - start
+        sort_buffer(arr, reverse=reverse)
+        return SortReport('vectorized', detect_time, None)
+    if len(arr) <= INSERTION_MAX_SIZE:
+        #too short for profiling to pay off
+        detect_time = time.perf_counter() - start
+        insertion_sort(arr, key=key, reverse=reverse)
+        return SortReport('insertion', detect_time, None)
+
+    keys = arr if key is None else list(map(key, arr))
+    if reverse:
+        #descending sorts work on the reversed list
+        keys = keys[::-1]
+    profile = profile_input(keys)
+    algorithm = choose_algorithm(profile)
+    detect_time = time.perf_counter() - start
+    ALGORITHMS[algorithm](arr, key=key, reverse=reverse)
+    return SortReport(algorithm, detect_time, profile)
+
+
+def sort(arr, key: Optional[Callable] = None, reverse: bool = False) -> None:
+    """Sort a list or integer buffer in place.
+
+    Args:
+        arr: list, NumPy array or array.array to be sorted in place
+        key (Callable, optional): function computing each element's
+            sort key, lists only. Defaults to None (compare elements)
+        reverse (bool): sort descending
+
+    Returns:
+        None
+    """
+    smart_sort(arr, key=key, reverse=reverse)
@@ -1,5 +1,51 @@
+"""
+Shared timing tools for every benchmark script.
+
+- timer: decorator recording one call's run time in function.last_run
+- time_execution: same, recorded in function.last_time
+- benchmark: repeated, calibrated timing with summary statistics
+- measure_memory: peak and retained memory of one call with tracemalloc
+
+Setting BENCH_PROFILE (e.g. 'merge_sort:1000,dijkstra') before the
+benchmark modules load makes timer and time_execution profile the named
+functions with profiler.profile_from_env. Only the named functions get
+the profiling wrapper, every other function is decorated exactly as
+without it, so profiling off costs nothing.
+
+timer and time_execution are the original single call timers and stay
+for backward compatibility. benchmark is what the benchmark runners use:
+it warms up, calibrates how many calls make one trial, builds fresh
+inputs for every call outside the timed region, optionally disables
+garbage collection and reports min, median, IQR and a confidence
+interval for the median. measure_memory runs its own untimed call, so
+tracing overhead never reaches the timings.
+"""
+
+import gc
+import math
+import os
+import statistics
 import time
+import tracemalloc
 from functools import wraps
+from typing import Callable, List, NamedTuple, Optional
+
+# calibrate loops until one trial takes at least this many seconds
+TARGET_TRIAL_TIME = 0.01
+# keep adding trials until they total this many seconds...
+MIN_TOTAL_TIME = 0.2
+# ...within these bounds
+MIN_REPEAT = 5
+MAX_REPEAT = 50
+# never prepare more than this many inputs for one trial
+MAX_NUMBER = 10_000
+
+def _profile_hook(func):
+    """Profiling wrapper for func if BENCH_PROFILE selects it, else None."""
+    if not os.environ.get("BENCH_PROFILE"):
+        return None
+    from profiler import profile_from_env
+    return profile_from_env(func)
 
 def timer(func):
     """
@@ -8,12 +54,14 @@ def timer(func):
     clear wrapper after each iteration. Can collect the last runtime 
     using function.last_run
     """
+    # chosen once here, so functions not being profiled pay nothing
+    target = _profile_hook(func) or func
     @wraps(func)
     def wrapper(*args, **kwargs):
         # record start time
         start = time.perf_counter()
         # run function
-        result = func(*args, **kwargs)
+        result = target(*args, **kwargs)
         # stop timer and find runtime
         run_time = time.perf_counter() - start 
         # store run_tim as last run
@@ -22,4 +70,202 @@ def timer(func):
         return result
     # clear last_run value
     wrapper.last_run = None
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+def time_execution(func):
+    """
+    Decorator that records the execution time of the decorated function.
+
+    Args:
+        func (callable): The function to wrap.
+
+    Returns:
+        callable: A wrapped version of `func` that allows calling
+        last_time to get execution time.
+    """
+    target = _profile_hook(func) or func # profiled only if BENCH_PROFILE names it
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        """
+        Inner wrapper that times a single call to `func`.
+        """
+        start = time.perf_counter() # start time
+        results = target(*args, **kwargs) #store any returned values
+        run_time = time.perf_counter() - start
+        wrapper.last_time = run_time
+        return results
+    wrapper.last_time = None # reset before each new run
+    return wrapper
+
+
+class BenchmarkResult(NamedTuple):
+    """Summary of repeated timings, all times are seconds per call."""
+    number: int             # calls per trial
+    repeat: int             # trials timed
+    samples: List[float]    # per call time of every trial
+    min: float
+    median: float
+    iqr: float              # interquartile range
+    ci_low: float           # confidence interval of the median
+    ci_high: float
+
+
+def summarize(samples: List[float], number: int = 1,
+              confidence: float = 0.95) -> BenchmarkResult:
+    """
+    Summarize per call times from repeated trials.
+
+    The confidence interval of the median is distribution free: the
+    order statistics whose ranks bracket the median with the requested
+    coverage (normal approximation to the binomial).
+
+    Args:
+        samples (List[float]): per call time of each trial
+        number (int): calls per trial
+        confidence (float): coverage of the median interval
+
+    Returns:
+        BenchmarkResult: the summary
+    """
+    ordered = sorted(samples)
+    n = len(ordered)
+    if n >= 4:
+        q1, _, q3 = statistics.quantiles(ordered, n=4)
+        iqr = q3 - q1
+    else:
+        iqr = ordered[-1] - ordered[0]
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    half_width = z * math.sqrt(n) / 2
+    #1 based ranks floor(n/2 - hw) and ceil(1 + n/2 + hw), as 0 based indexes
+    low_rank = max(0, math.floor(n / 2 - half_width) - 1)
+    high_rank = min(n - 1, math.ceil(n / 2 + half_width))
+    return BenchmarkResult(number, n, samples, ordered[0],
+                           statistics.median(ordered), iqr,
+                           ordered[low_rank], ordered[high_rank])
+
+
+def _run_trial(func: Callable, setup: Optional[Callable], number: int,
+               disable_gc: bool) -> float:
+    """Time `number` calls of func, inputs built before the clock starts."""
+    inputs = [setup() if setup is not None else () for _ in range(number)]
+    gc_was_enabled = gc.isenabled()
+    if disable_gc:
+        gc.collect()
+        gc.disable()
+    try:
+        start = time.perf_counter()
+        for args in inputs:
+            func(*args)
+        return time.perf_counter() - start
+    finally:
+        if disable_gc and gc_was_enabled:
+            gc.enable()
+
+
+def benchmark(func: Callable, setup: Optional[Callable] = None,
+              repeat: Optional[int] = None, number: Optional[int] = None,
+              warmup: int = 1, disable_gc: bool = True,
+              confidence: float = 0.95) -> BenchmarkResult:
+    """
+    Time func over repeated, calibrated trials.
+
+    Every call gets its own arguments from setup, built before the
+    trial's clock starts, so in-place sorts never see already sorted
+    data. Without a fixed number, loops per trial double until a trial
+    takes TARGET_TRIAL_TIME. Without a fixed repeat, trials run until
+    MIN_TOTAL_TIME has passed (MIN_REPEAT to MAX_REPEAT trials).
+
+    Args:
+        func (Callable): function to time
+        setup (Callable, optional): returns a fresh tuple of arguments
+            for one call. Defaults to calling func with no arguments
+        repeat (int, optional): number of timed trials
+        number (int, optional): calls per trial, use 1 when calls share
+            state that setup cannot rebuild independently
+        warmup (int): untimed calls made first
+        disable_gc (bool): turn off garbage collection while timing
+        confidence (float): coverage of the median confidence interval
+
+    Returns:
+        BenchmarkResult: per call timing statistics
+    """
+    for _ in range(warmup):
+        func(*(setup() if setup is not None else ()))
+
+    if number is None:
+        number = 1
+        while number < MAX_NUMBER:
+            if _run_trial(func, setup, number, disable_gc) >= TARGET_TRIAL_TIME:
+                break
+            number = min(number * 2, MAX_NUMBER)
+
+    samples = []
+    total = 0.0
+    while True:
+        trial = _run_trial(func, setup, number, disable_gc)
+        samples.append(trial / number)
+        total += trial
+        if repeat is not None:
+            if len(samples) >= repeat:
+                break
+        elif len(samples) >= MAX_REPEAT or (
+                len(samples) >= MIN_REPEAT and total >= MIN_TOTAL_TIME):
+            break
+    return summarize(samples, number, confidence)
+
+
+class MemoryResult(NamedTuple):
+    """Memory used by one call, in bytes unless noted."""
+    peak: int       # most memory allocated at once during the call
+    retained: int   # memory the call left allocated after returning
+    blocks: int     # number of memory blocks the call left allocated
+
+
+# tracemalloc's own snapshots are not part of the measured call
+_TRACEMALLOC_FILTER = (tracemalloc.Filter(False, tracemalloc.__file__),)
+
+
+def measure_memory(func: Callable, setup: Optional[Callable] = None,
+                   warmup: int = 1) -> MemoryResult:
+    """
+    Trace the memory allocated by one call of func with tracemalloc.
+
+    Arguments are built by setup before tracing starts, so only the
+    call itself is counted, and warmup calls first fill one time caches
+    so they are not mistaken for retained memory. Tracing slows every
+    allocation down, run this apart from benchmark, never inside a
+    timed trial.
+
+    Args:
+        func (Callable): function to measure
+        setup (Callable, optional): returns the tuple of arguments for
+            the call. Defaults to calling func with no arguments
+        warmup (int): untraced calls made first
+
+    Returns:
+        MemoryResult: peak bytes above the starting point, and bytes and
+            blocks still allocated afterwards (the return value included)
+    """
+    for _ in range(warmup):
+        func(*(setup() if setup is not None else ()))
+    args = setup() if setup is not None else ()
+    was_tracing = tracemalloc.is_tracing()
+    gc.collect()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        start_size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = func(*args)
+        end_size, peak_size = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        del result
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    #filter only now, filtering compiles patterns that would count as retained
+    diff = after.filter_traces(_TRACEMALLOC_FILTER).compare_to(
+        before.filter_traces(_TRACEMALLOC_FILTER), 'filename')
+    return MemoryResult(max(peak_size - start_size, 0), max(end_size - start_size, 0),
+                        max(sum(stat.count_diff for stat in diff), 0))
@@ -2,12 +2,48 @@ from sort_algos import (
     selection_sort, 
     insertion_sort,
     merge_sort, 
-    bubble_sort
+    bubble_sort,
+    natural_merge_sort,
+    intro_sort,
+    radix_sort,
+    counting_sort,
+    bucket_sort
 )
-from function_timer import timer
-from typing import List, Tuple
+from dispatch import smart_sort
+from selection import select, partial_sort, nsmallest
+from function_timer import timer, benchmark, measure_memory
+from bench_history import HISTORY_PATH, record
+from complexity import fit_frame
+from op_counter import count_operations
+from operator import attrgetter
+from typing import List, NamedTuple, Tuple
 import pandas as pd
 import random
+import statistics
+
+
+# complexity class each sort should show, by algorithm
+SORT_COMPLEXITY = {
+    'Selection': 'n^2',
+    'Insertion': 'n^2',
+    'Merge': 'n log n',
+    'Bubble': 'n^2'
+}
+# input types that change an algorithm's class
+INPUT_COMPLEXITY = {
+    ('Insertion', 'sorted'): 'n',
+    ('Insertion', 'almost_sorted'): 'n'
+}
+
+
+# distinct scores in run_record_test, few so many records share a key
+RECORD_SCORES = 10
+
+
+class Record(NamedTuple):
+    """A production style record sorted by one or more fields."""
+    id: int
+    score: int
 
 
 def collect_user_inputs():
@@ -81,22 +117,45 @@ def test_cases(size: int):
 
     return random_list, sorted_list, reverse_sorted, almost_sorted
 
-def run_test(arr: list[int]):
+def run_test(arr: list[int], memory: bool = False, counts: bool = False):
     """
     Test each of the four sort algorithms, store the time they took,
     size of the list, if the sort is accurate in an dataframe.
 
+    Times come from function_timer.benchmark: repeated, calibrated
+    trials where every call sorts a fresh copy of arr. With memory on,
+    one more untimed call per sort is traced by measure_memory. With
+    counts on, an instrumented copy of each sort counts its operations,
+    the timed sorts themselves are never instrumented.
+
     Args:
         arr (list[int]): list to be sorted
+        memory (bool): add the memory columns
+        counts (bool): add the operation count columns
 
     Returns:
         df (Pandas DataFrame): results in a table with columns:
             Algorithm - which algorithm results are for
             Size - size of the list that was sorted
-            Time - seconds sort algorithm took to complete
+            Time - median seconds sort algorithm took to complete
+            Min - fastest seconds seen
+            IQR - interquartile range of the seconds
+            CI Low, CI High - 95% confidence interval of the median
+            Trials - number of timed trials
             Accurate - if results are sorted properly
+            Samples - per call seconds of every trial
+        and with memory on:
+            Peak Bytes - most memory the sort allocated at once
+            Retained Bytes - memory still allocated after it returned
+            Retained Blocks - memory blocks still allocated after it returned
+        and with counts on:
+            Comparisons - element comparisons
+            Moves - element writes
+            Swaps - statements exchanging two elements
     """
     results = []
+    memory_columns = ['Peak Bytes', 'Retained Bytes', 'Retained Blocks'] if memory else []
+    count_columns = ['Comparisons', 'Moves', 'Swaps'] if counts else []
 
     for name, func in [
         ("Selection", selection_sort), 
@@ -107,35 +166,288 @@ def run_test(arr: list[int]):
         data = arr.copy()
         if name != 'Merge':
             func(data)
+            setup = lambda: (arr.copy(),)
         else:
             func(data, 0, len(arr) - 1)
+            setup = lambda: (arr.copy(), 0, len(arr) - 1)
         accurate = (data == sorted(arr))
-        run_time = func.last_run
+        stats = benchmark(func, setup)
         results.append({
             'Algorithm': name,
             'Size': len(arr),
-            'Time': run_time,
-            'Accurate': accurate
+            'Time': stats.median,
+            'Min': stats.min,
+            'IQR': stats.iqr,
+            'CI Low': stats.ci_low,
+            'CI High': stats.ci_high,
+            'Trials': stats.repeat,
+            'Accurate': accurate,
+            'Samples': stats.samples
         })
-    df = pd.DataFrame(results, columns = ['Algorithm', 'Size', 'Time', 'Accurate'])
+        if memory:
+            #traced separately so tracemalloc overhead never reaches the timings
+            usage = measure_memory(func, setup)
+            results[-1].update({
+                'Peak Bytes': usage.peak,
+                'Retained Bytes': usage.retained,
+                'Retained Blocks': usage.blocks
+            })
+        if counts:
+            ops = count_operations(func, *setup())
+            results[-1].update({
+                'Comparisons': ops['comparisons'],
+                'Moves': ops['moves'],
+                'Swaps': ops['swaps']
+            })
+    df = pd.DataFrame(results, columns = ['Algorithm', 'Size', 'Time', 'Min', 'IQR',
+                                          'CI Low', 'CI High', 'Trials', 'Accurate',
+                                          'Samples'] + memory_columns + count_columns)
     return df
 
-def get_results(size):
+def smart_vs_fixed(size: int):
+    """
+    Compare smart_sort against every fixed sort algorithm on each of
+    the test_cases list types.
+
+    Times are medians from function_timer.benchmark, every call sorts a
+    fresh copy of the list, so one noisy run cannot decide the winner.
+
+    Args:
+        size (int): number of elements in each test list
+
+    Returns:
+        df (Pandas DataFrame): one row per test type with columns:
+            Test Type - which test_cases list was sorted
+            Size - size of the list that was sorted
+            Smart Choice - algorithm smart_sort picked
+            Detect Time - seconds smart_sort spent picking it, one call
+            Smart Time - median seconds for smart_sort, detection included
+            Smart IQR - interquartile range of smart_sort's seconds
+            Best Fixed - fastest fixed algorithm on this list
+            Best Time - median seconds of the fastest fixed algorithm
+            Ratio - Smart Time / Best Time, near 1 means no loss
+    """
+    fixed_sorts = [
+        ("Selection", selection_sort),
+        ("Insertion", insertion_sort),
+        ("Merge", merge_sort),
+        ("Bubble", bubble_sort),
+        ("Natural Merge", natural_merge_sort),
+        ("Intro", intro_sort),
+        ("Radix", radix_sort),
+        ("Counting", counting_sort),
+        ("Bucket", bucket_sort)
+    ]
+    results = []
+    test_labels = ['random', 'sorted', 'reverse_sorted', 'almost_sorted']
+    for arr, label in zip(test_cases(size), test_labels):
+        fixed_times = {}
+        for name, func in fixed_sorts:
+            if name != 'Merge':
+                setup = lambda: (arr.copy(),)
+            else:
+                setup = lambda: (arr.copy(), 0, len(arr) - 1)
+            fixed_times[name] = benchmark(func, setup).median
+        best = min(fixed_times, key=fixed_times.get)
+
+        report = smart_sort(arr.copy())
+        smart = benchmark(smart_sort, lambda: (arr.copy(),))
+        results.append({
+            'Test Type': label,
+            'Size': len(arr),
+            'Smart Choice': report.algorithm,
+            'Detect Time': report.detect_time,
+            'Smart Time': smart.median,
+            'Smart IQR': smart.iqr,
+            'Best Fixed': best,
+            'Best Time': fixed_times[best],
+            'Ratio': smart.median / fixed_times[best]
+        })
+    return pd.DataFrame(results)
+
+def run_selection_test(arr: list[int], k: int):
+    """
+    Time select, partial_sort and nsmallest for the k smallest values
+    against a full smart_sort of the same list. Times come from
+    function_timer.benchmark, every call gets a fresh copy of arr.
+
+    Args:
+        arr (list[int]): list to select from
+        k (int): number of smallest values wanted, 1 <= k <= len(arr)
+
+    Returns:
+        df (Pandas DataFrame): results in a table with columns:
+            Algorithm - which algorithm results are for
+            Size - size of the list
+            K - number of smallest values wanted
+            Time - median seconds the algorithm took to complete
+            IQR - interquartile range of the seconds
+            Trials - number of timed trials
+            Accurate - if the k smallest values came out right
+    """
+    expected = sorted(arr)
+    results = []
+    for name, func in [
+        ("Select", select),
+        ("Partial Sort", partial_sort),
+        ("NSmallest", nsmallest),
+        ("Full Sort", smart_sort)
+    ]:
+        data = arr.copy()
+        if name == "Select":
+            accurate = func(data, k - 1) == expected[k - 1]
+            setup = lambda: (arr.copy(), k - 1)
+        elif name == "NSmallest":
+            accurate = func(data, k) == expected[:k]
+            setup = lambda: (arr.copy(), k)
+        elif name == "Partial Sort":
+            func(data, k)
+            accurate = data[:k] == expected[:k]
+            setup = lambda: (arr.copy(), k)
+        else:
+            func(data)
+            accurate = data == expected
+            setup = lambda: (arr.copy(),)
+        stats = benchmark(func, setup)
+        results.append({
+            'Algorithm': name,
+            'Size': len(arr),
+            'K': k,
+            'Time': stats.median,
+            'IQR': stats.iqr,
+            'Trials': stats.repeat,
+            'Accurate': accurate
+        })
+    return pd.DataFrame(results, columns = ['Algorithm', 'Size', 'K', 'Time', 'IQR',
+                                            'Trials', 'Accurate'])
+
+def run_record_test(size: int):
+    """
+    Sort records by a field with every sort algorithm using key=, and
+    report the key computation cost apart from the sort itself.
+
+    Scores repeat (RECORD_SCORES distinct values) and ids follow the
+    original order, so an unstable sort shows up as ids out of order
+    within a score. Times come from function_timer.benchmark, every call
+    sorts a fresh copy of the records and its key time is collected.
+
+    Args:
+        size (int): number of records to sort
+
+    Returns:
+        df (Pandas DataFrame): results in a table with columns:
+            Algorithm - which algorithm results are for
+            Size - number of records sorted
+            Time - median seconds the sort took, key computation excluded
+            IQR - interquartile range of the seconds, key computation
+                included
+            Key Time - median seconds spent computing keys and decorating
+            Accurate - if records match a stable sort by the same key
+            Stable - if records with equal keys kept their original order
+    """
+    records = [Record(i, random.randrange(RECORD_SCORES)) for i in range(size)]
+    by_score = attrgetter('score')
+    results = []
+    for name, func, key in [
+        ("Selection", selection_sort, by_score),
+        ("Insertion", insertion_sort, by_score),
+        ("Merge", merge_sort, by_score),
+        ("Bubble", bubble_sort, by_score),
+        ("Natural Merge", natural_merge_sort, by_score),
+        ("Intro", intro_sort, by_score),
+        ("Radix", radix_sort, by_score),
+        ("Radix (score, id)", radix_sort, attrgetter('score', 'id')),
+        ("Counting", counting_sort, by_score),
+        ("Bucket", bucket_sort, by_score)
+    ]:
+        data = records.copy()
+        if name != 'Merge':
+            func(data, key=key)
+            setup = lambda: (records.copy(),)
+        else:
+            func(data, 0, len(data) - 1, key=key)
+            setup = lambda: (records.copy(), 0, len(records) - 1)
+        key_times = []
+
+        def keyed_call(*args, func=func, key=key, key_times=key_times):
+            func(*args, key=key)
+            key_times.append(func.last_key_time)
+        stats = benchmark(keyed_call, setup)
+        key_time = statistics.median(key_times)
+        stable = all(a.id < b.id for a, b in zip(data, data[1:]) if key(a) == key(b))
+        results.append({
+            'Algorithm': name,
+            'Size': size,
+            'Time': stats.median - key_time,
+            'IQR': stats.iqr,
+            'Key Time': key_time,
+            'Accurate': data == sorted(records, key=key),
+            'Stable': stable
+        })
+    return pd.DataFrame(results, columns = ['Algorithm', 'Size', 'Time', 'IQR', 'Key Time',
+                                            'Accurate', 'Stable'])
+
+def expected_complexity(series: tuple):
+    """
+    Complexity class a get_results series should follow.
+
+    Args:
+        series (tuple): (algorithm, test type)
+
+    Returns:
+        str: model name from complexity.MODELS, None if unknown
+    """
+    return INPUT_COMPLEXITY.get(series, SORT_COMPLEXITY.get(series[0]))
+
+def scaling_report(df):
+    """
+    Fit each algorithm and test type series of get_results output to a
+    complexity model and predict its time at production sizes.
+
+    Args:
+        df (Pandas DataFrame): get_results output for several sizes
+
+    Returns:
+        df (Pandas DataFrame): complexity.fit_frame table with a Warning
+            for every series that does not scale as expected
+    """
+    return fit_frame(df, ['Algorithm', 'Test Types:'], expected=expected_complexity)
+
+def get_results(size, history=HISTORY_PATH, memory=False, counts=False):
+    """
+    Run every sort on each test_cases list type and append the timings
+    to the benchmark history.
+
+    Args:
+        size (int): number of elements in each test list
+        history (PathLike, optional): history file for bench_history,
+            None to skip recording
+        memory (bool): add run_test's memory columns
+        counts (bool): add run_test's operation count columns
+
+    Returns:
+        df (Pandas DataFrame): run_test results of every list type with
+            a 'Test Types:' column
+    """
     master_df = []
     arrays: Tuple[List[int], List[int], List[int], List[int]] = test_cases(size)
     test_labels = ['random', 'sorted', 'reverse_sorted', 'almost_sorted']
     for arr, label in zip(arrays, test_labels):
-            result_df = run_test(arr)
+            result_df = run_test(arr, memory, counts)
             result_df['Test Types:'] = label
             master_df.append(result_df)
     combined_df = pd.concat(master_df, ignore_index = True)
+    if history is not None:
+        record('sort', (({'algorithm': row['Algorithm'], 'size': row['Size'],
+                          'test type': row['Test Types:']}, row['Samples'])
+                        for _, row in combined_df.iterrows()), history)
     return combined_df
 
 if __name__ == '__main__':
     test_runs_df = []
     test_sizes = [10,100,1000]
     for n in test_sizes:
-        test_runs_df.append(get_results(n))
+        test_runs_df.append(get_results(n, memory=True, counts=True))
     show_df = pd.concat(test_runs_df, ignore_index=True)
     pivot_df = show_df.pivot_table(
         index=['Algorithm', 'Size'],
@@ -145,6 +457,44 @@ if __name__ == '__main__':
     print("Initial Test Results in Seconds")
     print(pivot_df.to_string(index = True))
 
+    memory_df = show_df.pivot_table(
+        index=['Algorithm', 'Size'],
+        columns = 'Test Types:',
+        values = 'Peak Bytes'
+    )
+    print("\nPeak Memory in Bytes")
+    print(memory_df.to_string(index = True))
+
+    count_df = show_df.pivot_table(
+        index=['Algorithm', 'Size'],
+        columns = 'Test Types:',
+        values = ['Comparisons', 'Moves']
+    )
+    print("\nElement Comparisons and Moves")
+    print(count_df.to_string(index = True))
+
+    scaling_df = scaling_report(show_df)
+    print("\nScaling Fit and Predicted Seconds at Production Sizes")
+    print(scaling_df.drop(columns='Warning').to_string(index = False))
+    for _, row in scaling_df[scaling_df['Warning'] != ''].iterrows():
+        print(f"WARNING: {row['Algorithm']} on {row['Test Types:']} lists {row['Warning']}")
+
+    smart_df = pd.concat([smart_vs_fixed(n) for n in test_sizes], ignore_index=True)
+    print("\nsmart_sort vs Best Fixed Algorithm in Seconds")
+    print(smart_df.to_string(index = False))
+
+    selection_df = pd.concat(
+        [run_selection_test(create_list(n), k)
+         for n in test_sizes for k in (1, max(1, n // 10), n // 2)],
+        ignore_index=True
+    )
+    print("\nTop-k and Selection vs Full Sort in Seconds")
+    print(selection_df.to_string(index = False))
+
+    record_df = pd.concat([run_record_test(n) for n in test_sizes], ignore_index=True)
+    print("\nSorting Records by Key in Seconds")
+    print(record_df.to_string(index = False))
+
 
     user_test_n = collect_user_inputs()
     user_df = get_results(user_test_n)
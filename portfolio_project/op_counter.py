@@ -0,0 +1,290 @@
+"""
+Operation counting for deterministic, machine independent benchmarks.
+
+- count_operations: run an instrumented copy of a function once and
+  return how many operations of each kind it performed
+- instrument: build (and cache) the instrumented copy
+
+Instrumented copies are compiled from the function's own source with
+counting calls added by an AST transform, the original functions are
+never touched, so production calls pay nothing when counting is off.
+Functions of the same module called by name (merge_sort -> merge) and
+recursive calls are instrumented too, decorators are left out.
+
+Counted operations:
+    comparisons - <, <=, >, >=, ==, != on elements: an operand is a
+                  subscript, an attribute or a name bound to an element
+                  (not loop indexes or lengths). bisect calls count the
+                  log2 comparisons they make in C
+    moves       - element writes: subscript and attribute stores, items
+                  stored by slice assignment, append, insert and extend
+    swaps       - one statement storing two or more subscripts
+    queue ops   - pop, popleft and heapq push / pop calls
+    updates     - if bodies run that store elements after a comparison
+                  of elements, e.g. successful edge relaxations
+    iterations  - loop bodies run, also kept per loop as
+                  'loop <target>' ('loop while <test>' for while loops)
+"""
+
+import ast
+import inspect
+import textwrap
+from collections import Counter
+from typing import Callable, Dict, Set
+
+# calls whose result is a length or index, never an element
+_INDEX_CALLS = {'len', 'range', 'enumerate', 'min', 'max', 'abs', 'sum'}
+# comparison operators that order or equate elements
+_ORDER_OPS = (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq)
+# list methods that store one new element
+_STORE_ONE = {'append', 'appendleft', 'insert'}
+# list methods that store every element of their last argument
+_STORE_MANY = {'extend', 'extendleft'}
+# calls that take from or add to a queue or heap
+_QUEUE_CALLS = {'pop', 'popleft', 'heappush', 'heappop', 'heappushpop', 'heapreplace'}
+# binary searches run in C, their comparisons are counted from the range
+_BISECT_CALLS = {'bisect_left', 'bisect_right', 'bisect', 'insort', 'insort_left',
+                 'insort_right'}
+
+# instrumented copies by original function
+_instrumented: Dict[Callable, Callable] = {}
+
+
+class _Ops:
+    """Counter shared by every instrumented function, reset per run."""
+
+    def __init__(self) -> None:
+        self.counts: Counter = Counter()
+
+    def compare(self, result):
+        self.counts['comparisons'] += 1
+        return result
+
+    def moved(self, values):
+        #stores of a whole sequence, count its items
+        if not hasattr(values, '__len__'):
+            values = list(values)
+        self.counts['moves'] += len(values)
+        return values
+
+    def bisect(self, func, a, x, lo=0, hi=None, **kwargs):
+        hi = len(a) if hi is None else hi
+        self.counts['comparisons'] += max(hi - lo, 0).bit_length()
+        return func(a, x, lo, hi, **kwargs)
+
+
+def _call_name(node: ast.AST) -> str:
+    """Name of the function or method a Call node calls, '' if none."""
+    if isinstance(node, ast.Call):
+        if isinstance(node.func, ast.Name):
+            return node.func.id
+        if isinstance(node.func, ast.Attribute):
+            return node.func.attr
+    return ''
+
+
+def _touches_elements(node: ast.AST, elements: Set[str]) -> bool:
+    """True if an expression reads an element of a container."""
+    if _call_name(node) in _INDEX_CALLS:
+        return False
+    if isinstance(node, (ast.Subscript, ast.Attribute)):
+        return True
+    if isinstance(node, ast.Name):
+        return node.id in elements
+    if isinstance(node, ast.Call):
+        return any(_touches_elements(arg, elements) for arg in node.args)
+    return any(_touches_elements(child, elements) for child in ast.iter_child_nodes(node))
+
+
+def _element_names(tree: ast.AST) -> Set[str]:
+    """Names bound to elements: assigned from element reads, or loop
+    targets over containers (the value half of enumerate)."""
+    elements: Set[str] = set()
+    #repeat until no new name is found, element names spread through assigns
+    while True:
+        before = len(elements)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assign) and _touches_elements(node.value, elements):
+                for target in node.targets:
+                    elements.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+            elif isinstance(node, ast.For):
+                name = _call_name(node.iter)
+                target = node.target
+                if name == 'enumerate' and isinstance(target, ast.Tuple):
+                    target = target.elts[-1]
+                elif name in _INDEX_CALLS:
+                    continue
+                elements.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+        if len(elements) == before:
+            return elements
+
+
+def _bisect_names(tree: ast.AST) -> Set[str]:
+    """bisect functions and local names bound to them
+    (find = bisect_right if stable else bisect_left)."""
+    names = set(_BISECT_CALLS)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(
+                isinstance(n, ast.Name) and n.id in _BISECT_CALLS
+                for n in ast.walk(node.value)):
+            names.update(t.id for t in node.targets if isinstance(t, ast.Name))
+    return names
+
+
+def _ops_call(method: str, *args: ast.expr) -> ast.Call:
+    """AST for __ops__.method(*args)."""
+    return ast.Call(ast.Attribute(ast.Name('__ops__', ast.Load()), method, ast.Load()),
+                    list(args), [])
+
+
+def _count_stmt(key: str, amount: int = 1) -> ast.stmt:
+    """AST for __ops__.counts[key] += amount."""
+    target = ast.Subscript(ast.Attribute(ast.Name('__ops__', ast.Load()), 'counts', ast.Load()),
+                           ast.Constant(key), ast.Store())
+    return ast.AugAssign(target, ast.Add(), ast.Constant(amount))
+
+
+class _Instrumenter(ast.NodeTransformer):
+    """Add counting calls to one function's AST."""
+
+    def __init__(self, elements: Set[str], bisects: Set[str]) -> None:
+        self.elements = elements
+        self.bisects = bisects
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        self.generic_visit(node)
+        if (all(isinstance(op, _ORDER_OPS) for op in node.ops)
+                and any(_touches_elements(side, self.elements)
+                        for side in [node.left, *node.comparators])):
+            return _ops_call('compare', node)
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        name = _call_name(node)
+        if name in self.bisects:
+            return ast.Call(_ops_call('bisect').func, [node.func, *node.args], node.keywords)
+        if name in _STORE_MANY and node.args:
+            node.args[-1] = _ops_call('moved', node.args[-1])
+        return node
+
+    def visit_Expr(self, node: ast.Expr) -> ast.AST:
+        self.generic_visit(node)
+        name = _call_name(node.value)
+        if name in _STORE_ONE:
+            return [_count_stmt('moves'), node]
+        if name in _QUEUE_CALLS:
+            return [_count_stmt('queue ops'), node]
+        return node
+
+    def visit_Assign(self, node: ast.Assign) -> ast.AST:
+        self.generic_visit(node)
+        extra = []
+        if _call_name(node.value) in _QUEUE_CALLS:
+            extra.append(_count_stmt('queue ops'))
+        stores = [t for target in node.targets for t in ast.walk(target)
+                  if isinstance(t, (ast.Subscript, ast.Attribute))
+                  and isinstance(t.ctx, ast.Store)]
+        if len(stores) == 1 and isinstance(stores[0], ast.Subscript) \
+                and isinstance(stores[0].slice, ast.Slice):
+            node.value = _ops_call('moved', node.value)
+        elif stores:
+            extra.append(_count_stmt('moves', len(stores)))
+            if sum(isinstance(t, ast.Subscript) for t in stores) >= 2:
+                extra.append(_count_stmt('swaps'))
+        return [*extra, node] if extra else node
+
+    def visit_AugAssign(self, node: ast.AugAssign) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.target, (ast.Subscript, ast.Attribute)):
+            return [_count_stmt('moves'), node]
+        return node
+
+    def visit_If(self, node: ast.If) -> ast.AST:
+        #element stores directly in the body, before counting calls are added
+        stores = any(isinstance(t, (ast.Subscript, ast.Attribute))
+                     for stmt in node.body if isinstance(stmt, (ast.Assign, ast.AugAssign))
+                     for t in (stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]))
+        self.generic_visit(node)
+        if stores and _call_name(node.test) == 'compare':
+            node.body = [_count_stmt('updates'), *node.body]
+        return node
+
+    def _loop(self, node, label: str):
+        self.generic_visit(node)
+        node.body = [_count_stmt('iterations'), _count_stmt(label), *node.body]
+        return node
+
+    def visit_For(self, node: ast.For) -> ast.AST:
+        return self._loop(node, f'loop {ast.unparse(node.target)}')
+
+    def visit_While(self, node: ast.While) -> ast.AST:
+        return self._loop(node, f'loop while {ast.unparse(node.test)}')
+
+
+def _called_names(tree: ast.AST) -> Set[str]:
+    """Names called as plain functions inside tree."""
+    return {node.func.id for node in ast.walk(tree)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name)}
+
+
+def instrument(func: Callable) -> Callable:
+    """
+    Build an instrumented copy of func and of every same module
+    function it calls by name.
+
+    Args:
+        func (Callable): function to copy, decorated functions are
+            unwrapped to the original
+
+    Returns:
+        Callable: the copy, it counts into its globals' __ops__
+    """
+    func = inspect.unwrap(func)
+    if func in _instrumented:
+        return _instrumented[func]
+    namespace = dict(func.__globals__)
+    namespace['__ops__'] = _Ops()
+    pending = [func]
+    done = {}
+    while pending:
+        original = pending.pop()
+        tree = ast.parse(textwrap.dedent(inspect.getsource(original)))
+        definition = tree.body[0]
+        definition.decorator_list = []
+        _Instrumenter(_element_names(definition), _bisect_names(definition)).visit(definition)
+        exec(compile(ast.fix_missing_locations(tree),
+                     f'<counted {original.__qualname__}>', 'exec'), namespace)
+        done[original] = namespace[original.__name__]
+        #same module helpers, recursive calls go to the copies too
+        for name in _called_names(definition):
+            target = func.__globals__.get(name)
+            if not inspect.isfunction(target):
+                continue
+            target = inspect.unwrap(target)
+            if (target.__module__ == func.__module__ and target not in done
+                    and target not in pending):
+                pending.append(target)
+    for original, copy in done.items():
+        _instrumented.setdefault(original, copy)
+    return done[func]
+
+
+def count_operations(func: Callable, *args, **kwargs) -> Counter:
+    """
+    Run an instrumented copy of func once and count its operations.
+
+    Args:
+        func (Callable): function to count, e.g. sort_algos.merge_sort
+        *args, **kwargs: arguments for the call, containers are changed
+            in place exactly as the original would change them
+
+    Returns:
+        Counter: count of each operation kind (see module docstring),
+            missing kinds are 0
+    """
+    copy = instrument(func)
+    ops = copy.__globals__['__ops__']
+    ops.counts = Counter()
+    copy(*args, **kwargs)
+    return ops.counts
@@ -0,0 +1,262 @@
+"""
+Parallel sort that spreads the work over a process pool.
+
+- parallel_sort: sort a list or integer buffer using every core
+- merge_path_split: find where a diagonal of the merge path crosses
+
+The input is copied once into a shared memory block, each worker sorts
+one chunk of it in place with the fastest local sort (dispatch.sort) so
+no chunk is ever pickled. The sorted chunks are combined with a k-way
+heap merge, or with rounds of pairwise merges split across the workers
+by merge path when there are many workers.
+"""
+
+import heapq
+import os
+from array import array
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+from dispatch import is_buffer, sort
+from function_timer import benchmark, timer
+
+# below this size the pool costs more than it saves
+PARALLEL_MIN_SIZE = 50_000
+# use merge path rounds instead of one heap merge from this many workers
+MERGE_PATH_MIN_WORKERS = 8
+
+
+def _typecode(arr) -> str:
+    """Return the array typecode used to share arr's values."""
+    if isinstance(arr, array):
+        return arr.typecode
+    if not isinstance(arr, list):
+        #NumPy arrays and other buffers keep their own item format
+        return memoryview(arr).format
+    return 'q'
+
+
+def _chunk_bounds(size: int, parts: int) -> List[Tuple[int, int]]:
+    """Split range(size) into `parts` nearly equal (lo, hi) slices."""
+    step, extra = divmod(size, parts)
+    bounds = []
+    lo = 0
+    for p in range(parts):
+        hi = lo + step + (1 if p < extra else 0)
+        bounds.append((lo, hi))
+        lo = hi
+    return bounds
+
+
+def _sort_chunk(name: str, typecode: str, lo: int, hi: int) -> None:
+    """Worker: sort shared[lo:hi] in place."""
+    shm = SharedMemory(name=name)
+    view = shm.buf.cast('B').cast(typecode)[lo:hi]
+    try:
+        if is_buffer is not None:
+            #vectorized sorts work straight on the shared memory
+            sort(view)
+        else:
+            chunk = view.tolist()
+            sort(chunk)
+            view[:] = array(typecode, chunk)
+    finally:
+        view.release()
+        shm.close()
+
+
+def merge_path_split(a, b, diag: int) -> Tuple[int, int]:
+    """Find where diagonal `diag` crosses the merge path of a and b.
+
+    The first `diag` elements of merge(a, b) are a[:i] and b[:j]. Ties
+    take from a first so merging each side of the split keeps the
+    merge stable.
+
+    Args:
+        a: sorted sequence
+        b: sorted sequence
+        diag (int): number of merged elements before the split
+
+    Returns:
+        Tuple[int, int]: (i, j) with i + j == diag
+    """
+    low = max(0, diag - len(b))
+    high = min(diag, len(a))
+    while low < high:
+        mid = (low + high) // 2
+        if a[mid] <= b[diag - mid - 1]:
+            low = mid + 1
+        else:
+            high = mid
+    return low, diag - low
+
+
+def _merge_segment(src_name: str, dst_name: str, typecode: str,
+                   a_range: Tuple[int, int], b_range: Tuple[int, int],
+                   out_lo: int) -> None:
+    """Worker: merge two sorted runs of src into dst starting at out_lo."""
+    src = SharedMemory(name=src_name)
+    dst = SharedMemory(name=dst_name)
+    src_view = src.buf.cast('B').cast(typecode)
+    dst_view = dst.buf.cast('B').cast(typecode)
+    try:
+        merged = array(typecode, heapq.merge(src_view[a_range[0]:a_range[1]],
+                                             src_view[b_range[0]:b_range[1]]))
+        dst_view[out_lo:out_lo + len(merged)] = merged
+    finally:
+        src_view.release()
+        dst_view.release()
+        src.close()
+        dst.close()
+
+
+def _merge_path_rounds(pool: Pool, blocks: Tuple[SharedMemory, SharedMemory],
+                       typecode: str, runs: List[Tuple[int, int]],
+                       workers: int) -> SharedMemory:
+    """Merge sorted runs pairwise until one is left, splitting every
+    pairwise merge over the workers by merge path.
+
+    Args:
+        pool (Pool): worker processes
+        blocks (Tuple[SharedMemory, SharedMemory]): block holding the runs
+            and a same sized scratch block, the two swap every round
+        typecode (str): array typecode of the values
+        runs (List[Tuple[int, int]]): (lo, hi) of each sorted run
+        workers (int): number of processes in pool
+
+    Returns:
+        SharedMemory: whichever block holds the fully merged values
+    """
+    src, dst = blocks
+    while len(runs) > 1:
+        view = src.buf.cast('B').cast(typecode)
+        tasks = []
+        next_runs = []
+        #each pair gets an equal share of the workers
+        parts = max(1, workers // (len(runs) // 2))
+        for r in range(0, len(runs) - 1, 2):
+            (a_lo, a_hi), (b_lo, b_hi) = runs[r], runs[r + 1]
+            a, b = view[a_lo:a_hi], view[b_lo:b_hi]
+            total = len(a) + len(b)
+            prev = (0, 0)
+            for p in range(1, parts + 1):
+                cut = merge_path_split(a, b, total * p // parts)
+                tasks.append((src.name, dst.name, typecode,
+                              (a_lo + prev[0], a_lo + cut[0]),
+                              (b_lo + prev[1], b_lo + cut[1]),
+                              a_lo + prev[0] + prev[1]))
+                prev = cut
+            a.release()
+            b.release()
+            next_runs.append((a_lo, b_hi))
+        if len(runs) % 2:
+            #odd run out is copied across unchanged
+            lo, hi = runs[-1]
+            dst_view = dst.buf.cast('B').cast(typecode)
+            dst_view[lo:hi] = view[lo:hi]
+            dst_view.release()
+            next_runs.append(runs[-1])
+        view.release()
+        pool.starmap(_merge_segment, tasks)
+        src, dst = dst, src
+        runs = next_runs
+    return src
+
+
+@timer #wrapper
+def parallel_sort(arr, workers: Optional[int] = None,
+                  merge_path: Optional[bool] = None) -> None:
+    """Sort a list or integer buffer in place across a process pool.
+
+    Copy the values once into shared memory, sort one chunk per worker
+    with dispatch.sort, then merge the chunks with a k-way heap merge
+    or, with many workers, with parallel merge path rounds.
+
+    Args:
+        arr: list of integers, array.array or NumPy array, sorted in place
+        workers (int, optional): processes to use. Defaults to os.cpu_count()
+        merge_path (bool, optional): force merge path (True) or heap merge
+            (False). Defaults to merge path from MERGE_PATH_MIN_WORKERS
+
+    Returns:
+        None
+    """
+    size = len(arr)
+    workers = workers or os.cpu_count() or 1
+    if size < PARALLEL_MIN_SIZE or workers == 1:
+        sort(arr)
+        return
+    if merge_path is None:
+        merge_path = workers >= MERGE_PATH_MIN_WORKERS
+
+    typecode = _typecode(arr)
+    values = arr if not isinstance(arr, list) else array(typecode, arr)
+    nbytes = size * memoryview(values).itemsize
+    #merge path rounds ping-pong between two blocks, heap merge needs one
+    blocks = tuple(SharedMemory(create=True, size=nbytes)
+                   for _ in range(2 if merge_path else 1))
+    try:
+        view = blocks[0].buf.cast('B').cast(typecode)
+        view[:] = memoryview(values).cast('B').cast(typecode)
+        view.release()
+        runs = _chunk_bounds(size, workers)
+        with Pool(workers) as pool:
+            pool.starmap(_sort_chunk,
+                         [(blocks[0].name, typecode, lo, hi) for lo, hi in runs])
+            result = blocks[0]
+            if merge_path:
+                result = _merge_path_rounds(pool, blocks, typecode, runs, workers)
+        view = result.buf.cast('B').cast(typecode)
+        if merge_path:
+            merged = view
+        else:
+            #k-way heap merge of the sorted chunks
+            merged = array(typecode, heapq.merge(*(view[lo:hi] for lo, hi in runs)))
+        if isinstance(arr, list):
+            arr[:] = merged.tolist()
+        else:
+            memoryview(arr).cast('B').cast(typecode)[:] = merged
+        del merged
+        view.release()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+if __name__ == '__main__':
+    import random
+    import sys
+
+    import pandas as pd
+
+    from dispatch import smart_sort
+
+    test_list = [random.randrange(-10**9, 10**9) for _ in range(200_000)]
+    expected = sorted(test_list)
+    for use_merge_path in (False, True):
+        data = test_list.copy()
+        parallel_sort(data, workers=4, merge_path=use_merge_path)
+        assert data == expected, f"parallel_sort failed (merge_path={use_merge_path})"
+    print("All test passed list sorted by both merges\n")
+
+    # sizes can be given on the command line, e.g. 100000 1000000
+    sizes = [int(x) for x in sys.argv[1:]] or [10**5, 10**6, 10**7, 10**8]
+    # single core list sorts are skipped where the list would not fit
+    list_max_size = 10**7
+    results = []
+    for n in sizes:
+        values = array('q', (random.randrange(-2**62, 2**62) for _ in range(n)))
+        #one timed trial is enough once a call takes seconds
+        long_run = {"repeat": 1, "number": 1, "warmup": 0} if n >= 10**7 else {}
+        row = {'Size': n, 'Workers': os.cpu_count()}
+        runs = [('Parallel', parallel_sort, lambda: (array('q', values),)),
+                ('Single core buffer', smart_sort, lambda: (array('q', values),))]
+        if n <= list_max_size:
+            runs.append(('Single core list', smart_sort, lambda: (values.tolist(),)))
+        for label, func, setup in runs:
+            stats = benchmark(func, setup, **long_run)
+            row[f'{label} (seconds)'] = stats.median
+            row[f'{label} IQR'] = stats.iqr
+        results.append(row)
+    print(pd.DataFrame(results).to_string(index=False))
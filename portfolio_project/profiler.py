@@ -0,0 +1,391 @@
+"""
+Profiling for benchmark hot path analysis.
+
+- profile: run repeated trials of one function under cProfile and a
+  sampling profiler, write the results and rank the hottest lines
+- ProfileSession: collects both profiles over many calls
+- profile_from_env: used by function_timer's decorators to profile a
+  chosen algorithm and input size from the BENCH_PROFILE variable
+
+Output files:
+    <name>.pstats     cProfile stats, open with pstats or snakeviz
+    <name>.collapsed  one 'frame;frame;frame count' line per sampled
+                      stack, the input format of flamegraph.pl/speedscope
+
+Nothing here is imported until profiling is asked for, so timed runs
+never pay for it.
+"""
+
+import atexit
+import cProfile
+import linecache
+import os
+import signal
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+# seconds of CPU time between stack samples
+DEFAULT_INTERVAL = 0.001
+# directory profiles are written to
+DEFAULT_OUT_DIR = Path("profiles")
+# hot lines listed in reports
+DEFAULT_TOP = 10
+
+# a sampled frame: (file, function, line)
+Frame = Tuple[str, str, int]
+
+
+class ProfileReport(NamedTuple):
+    """Files written for one profile and its hottest lines."""
+    pstats_path: Optional[Path]
+    collapsed_path: Optional[Path]
+    hot_lines: pd.DataFrame
+
+
+def _profiled_call(session: "ProfileSession", func: Callable, args: tuple,
+                   kwargs: dict):
+    """Call func, stacks sampled for session stop at this frame."""
+    return func(*args, **kwargs)
+
+
+class _Sampler:
+    """
+    One process wide stack sampler shared by every session.
+
+    Samples go to every session whose call is running, nested sessions
+    included. The sampler is paused whenever no sampling call is running,
+    so code timed between profiled calls is never interrupted. SIGPROF
+    only fires on a kernel tick (a few ms), calls shorter than that are
+    rarely sampled, cProfile still counts them.
+    """
+
+    def __init__(self) -> None:
+        self.running: List["ProfileSession"] = [] # sessions whose call is running
+        self.users: set = set() # sessions that want samples
+        self._thread: Optional[threading.Thread] = None
+        self._armed = False
+
+    def _sample(self, frame) -> None:
+        for session in self.running:
+            if session.sample:
+                session._record(frame)
+
+    def start(self, session: "ProfileSession") -> None:
+        """Send samples to session from now on, setting up the sampler
+        with its interval if it is the first user. Nothing is sampled
+        until a call is entered."""
+        if session in self.users:
+            return
+        self.users.add(session)
+        if len(self.users) > 1:
+            return
+        self._interval = session.interval
+        if (hasattr(signal, "setitimer")
+                and threading.current_thread() is threading.main_thread()):
+            #SIGPROF interrupts the main thread exactly where it is running
+            self._previous_handler = signal.signal(
+                signal.SIGPROF, lambda signum, frame: self._sample(frame))
+            return
+        #no SIGPROF here, sample from a helper thread instead
+        target = threading.get_ident()
+        self._done = threading.Event()
+        self._awake = threading.Event()
+
+        def sample_loop():
+            while self._awake.wait() and not self._done.wait(self._interval):
+                self._sample(sys._current_frames().get(target))
+
+        self._thread = threading.Thread(target=sample_loop, daemon=True)
+        self._switch = sys.getswitchinterval()
+        self._thread.start()
+
+    def enter(self, session: "ProfileSession") -> None:
+        """Mark session's call as running, resuming the sampler."""
+        self.running.append(session)
+        if session.sample and self.users and not self._armed:
+            self._armed = True
+            if self._thread is None:
+                signal.setitimer(signal.ITIMER_PROF, self._interval, self._interval)
+            else:
+                #let the sampler run as often as it asks to
+                sys.setswitchinterval(min(self._switch, self._interval))
+                self._awake.set()
+
+    def leave(self, session: "ProfileSession") -> None:
+        """Mark session's call as done, pausing the sampler once no
+        sampling call is running."""
+        self.running.remove(session)
+        if self._armed and not any(s.sample for s in self.running):
+            self._pause()
+
+    def _pause(self) -> None:
+        self._armed = False
+        if self._thread is None:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+        else:
+            self._awake.clear()
+            sys.setswitchinterval(self._switch)
+
+    def stop(self, session: "ProfileSession") -> None:
+        """Stop sampling for session, and stop the sampler once no
+        session uses it."""
+        if session not in self.users:
+            return
+        self.users.discard(session)
+        if self.users:
+            return
+        if self._armed:
+            self._pause()
+        if self._thread is None:
+            signal.signal(signal.SIGPROF, self._previous_handler)
+        else:
+            self._done.set()
+            self._awake.set()
+            self._thread.join()
+            self._thread = None
+
+
+_sampler = _Sampler()
+# session whose cProfile is enabled, Python runs one at a time: enabling
+# a second takes the hook from the first (3.11) or raises (3.12+)
+_cprofile_owner: Optional["ProfileSession"] = None
+
+
+class ProfileSession:
+    """
+    cProfile stats and sampled stacks gathered over many calls.
+
+    Every call run through the session adds to the same profile, so
+    repeated trials aggregate into one set of stats and hot lines.
+    """
+
+    def __init__(self, cprofile: bool = True, sample: bool = True,
+                 interval: float = DEFAULT_INTERVAL) -> None:
+        """
+        Initialize an empty session.
+
+        Args:
+            cprofile (bool): record deterministic cProfile stats
+            sample (bool): record stacks every `interval` seconds
+            interval (float): seconds of CPU time between samples
+
+        Returns:
+            None
+        """
+        self.profiler = cProfile.Profile() if cprofile else None
+        self.sample = sample
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.calls = 0
+        self.profiled_calls = 0 # calls cProfile recorded
+        self._active = False
+
+    def _record(self, frame) -> None:
+        """Add the stack below this session's _profiled_call to the samples."""
+        stack: List[Frame] = []
+        while frame is not None:
+            code = frame.f_code
+            if code is _profiled_call.__code__ and frame.f_locals.get("session") is self:
+                self.stacks[tuple(reversed(stack))] += 1
+                return
+            stack.append((code.co_filename, code.co_name, frame.f_lineno))
+            frame = frame.f_back
+
+    def run(self, func: Callable, *args, **kwargs):
+        """
+        Call func(*args, **kwargs) under the session's profilers.
+
+        Calls made while the session is already running one (recursion)
+        are part of the outer call's profile and run unchanged. Calls
+        made while another session's cProfile is running (one profiled
+        function calling another) are counted and sampled but left in
+        the outer cProfile, which keeps recording them.
+
+        Returns:
+            whatever func returns
+        """
+        global _cprofile_owner
+        if self._active:
+            return func(*args, **kwargs)
+        if self.sample:
+            _sampler.start(self)
+        _sampler.enter(self)
+        self._active = True
+        self.calls += 1
+        owner = False
+        if self.profiler is not None and _cprofile_owner is None:
+            try:
+                self.profiler.enable()
+                owner = True
+                _cprofile_owner = self
+                self.profiled_calls += 1
+            except ValueError: #another tool holds the profiling hook
+                pass
+        try:
+            return _profiled_call(self, func, args, kwargs)
+        finally:
+            if owner:
+                self.profiler.disable()
+                _cprofile_owner = None
+            self._active = False
+            #pauses the sampler, its timer never fires between calls
+            _sampler.leave(self)
+
+    def stop(self) -> None:
+        """Stop taking samples, called by write."""
+        _sampler.stop(self)
+
+    def hot_lines(self, top: int = DEFAULT_TOP) -> pd.DataFrame:
+        """
+        Rank source lines by how many samples were running them.
+
+        Args:
+            top (int): number of lines to return
+
+        Returns:
+            df (Pandas DataFrame): columns File, Line, Function, Samples,
+                Percent (of all samples) and Source (the line's code)
+        """
+        lines: Counter = Counter()
+        for stack, count in self.stacks.items():
+            if stack:
+                lines[stack[-1]] += count
+        total = sum(lines.values())
+        rows = [{
+            'File': os.path.basename(filename),
+            'Line': lineno,
+            'Function': function,
+            'Samples': count,
+            'Percent': 100 * count / total,
+            'Source': linecache.getline(filename, lineno).strip()
+        } for (filename, function, lineno), count in lines.most_common(top)]
+        return pd.DataFrame(rows, columns=['File', 'Line', 'Function', 'Samples',
+                                           'Percent', 'Source'])
+
+    def write(self, name: str, out_dir: Path = DEFAULT_OUT_DIR,
+              top: int = DEFAULT_TOP) -> ProfileReport:
+        """
+        Stop sampling and write the pstats and collapsed stack files.
+
+        Args:
+            name (str): file name stem, e.g. 'merge_sort_n1000'
+            out_dir (Path): directory to write to, created if missing
+            top (int): number of hot lines in the report
+
+        Returns:
+            ProfileReport: paths written (None for a profiler that was
+                off or only ran nested in another session's cProfile)
+                and the hot lines
+        """
+        self.stop()
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        pstats_path = collapsed_path = None
+        if self.profiler is not None and self.profiled_calls:
+            pstats_path = out_dir / f"{name}.pstats"
+            self.profiler.dump_stats(pstats_path)
+        if self.sample:
+            collapsed_path = out_dir / f"{name}.collapsed"
+            with open(collapsed_path, "w") as out:
+                for stack, count in sorted(self.stacks.items()):
+                    if not stack:
+                        continue
+                    frames = ";".join(f"{function} ({os.path.basename(filename)}:{lineno})"
+                                      for filename, function, lineno in stack)
+                    out.write(f"{frames} {count}\n")
+        return ProfileReport(pstats_path, collapsed_path, self.hot_lines(top))
+
+
+def profile(func: Callable, setup: Optional[Callable] = None, repeat: int = 5,
+            cprofile: bool = True, sample: bool = True,
+            interval: float = DEFAULT_INTERVAL, out_dir: Path = DEFAULT_OUT_DIR,
+            name: Optional[str] = None, top: int = DEFAULT_TOP) -> ProfileReport:
+    """
+    Profile repeated trials of func and write the results.
+
+    Every trial gets fresh arguments from setup, built outside the
+    profilers, and all trials aggregate into one profile.
+
+    Args:
+        func (Callable): function to profile
+        setup (Callable, optional): returns a fresh tuple of arguments
+            for one call. Defaults to calling func with no arguments
+        repeat (int): number of trials
+        cprofile (bool): write cProfile stats
+        sample (bool): write sampled stacks and rank hot lines
+        interval (float): seconds of CPU time between samples
+        out_dir (Path): directory to write to
+        name (str, optional): file name stem. Defaults to func's name
+        top (int): number of hot lines in the report
+
+    Returns:
+        ProfileReport: files written and the hottest lines
+    """
+    session = ProfileSession(cprofile, sample, interval)
+    for _ in range(repeat):
+        session.run(func, *(setup() if setup is not None else ()))
+    return session.write(name or func.__name__, out_dir, top)
+
+
+def _parse_targets(spec: str) -> Dict[str, Optional[int]]:
+    """Parse 'merge_sort:1000,dijkstra' into {name: size or None}."""
+    targets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, size = item.partition(":")
+        targets[name] = int(size) if size else None
+    return targets
+
+
+# sessions started from BENCH_PROFILE, written when the program exits
+_env_sessions: Dict[str, ProfileSession] = {}
+
+
+def _write_env_sessions() -> None:
+    """Write every BENCH_PROFILE session and print its hot lines."""
+    out_dir = Path(os.environ.get("BENCH_PROFILE_DIR", DEFAULT_OUT_DIR))
+    for name, session in _env_sessions.items():
+        if not session.calls:
+            continue
+        report = session.write(name, out_dir)
+        print(f"\nProfile of {name} over {session.calls} calls written to {out_dir}")
+        print(report.hot_lines.to_string(index=False))
+
+
+def profile_from_env(func: Callable) -> Optional[Callable]:
+    """
+    Profiling wrapper for func if BENCH_PROFILE selects it.
+
+    BENCH_PROFILE lists functions with an optional input size,
+    e.g. 'merge_sort:1000,dijkstra'. Calls whose first argument has
+    that length (any call without a size) run under a ProfileSession,
+    written to BENCH_PROFILE_DIR (default 'profiles') at exit.
+    BENCH_PROFILE_MODE picks 'cprofile', 'sample' or 'both' (default).
+
+    Args:
+        func (Callable): the function being decorated
+
+    Returns:
+        Callable: runs func, under the profilers when the size matches,
+            or None if func is not selected at all
+    """
+    targets = _parse_targets(os.environ.get("BENCH_PROFILE", ""))
+    if func.__name__ not in targets:
+        return None
+    size = targets[func.__name__]
+    mode = os.environ.get("BENCH_PROFILE_MODE", "both")
+    name = func.__name__ if size is None else f"{func.__name__}_n{size}"
+    if not _env_sessions:
+        atexit.register(_write_env_sessions)
+    session = _env_sessions.setdefault(name, ProfileSession(
+        cprofile=mode in ("cprofile", "both"), sample=mode in ("sample", "both")))
+
+    def call(*args, **kwargs):
+        if size is None or (args and hasattr(args[0], "__len__") and len(args[0]) == size):
+            return session.run(func, *args, **kwargs)
+        return func(*args, **kwargs)
+    return call
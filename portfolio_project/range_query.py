@@ -0,0 +1,242 @@
+"""
+Range queries over sorted arrays and sorted index structures.
+
+- lower_bound / upper_bound: rank of the first value >= / > a value
+- count_range: number of values in [lo, hi]
+- range_view: the values in [lo, hi] without copying them
+- lower_bound_many / upper_bound_many / count_range_many /
+  range_bounds_many: batched forms taking many values or ranges at once
+
+Every function takes any of:
+
+- a sorted list or tuple (bisect)
+- a sorted NumPy array (searchsorted, batches are vectorized)
+- a sorted array.array or other buffer (bisect, views are memoryviews)
+- a SortedIndex or SortedList (their own rank methods)
+
+Ranges are inclusive on both ends, count_range(arr, a, b) answers
+"how many values between a and b". An empty range (lo > hi) counts 0.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from typing import List, Tuple
+
+import numpy as np
+
+
+def _ranker(arr, strict: bool):
+    """Function value -> rank of the first value >= value (> if strict)."""
+    if isinstance(arr, np.ndarray):
+        side = 'right' if strict else 'left'
+        return lambda value: int(np.searchsorted(arr, value, side))
+    if hasattr(arr, 'upper_bound'): #SortedIndex
+        return arr.upper_bound if strict else arr.lower_bound
+    if hasattr(arr, 'bisect_right'): #SortedList
+        return arr.bisect_right if strict else arr.bisect_left
+    find = bisect_right if strict else bisect_left
+    return lambda value: find(arr, value)
+
+
+def lower_bound(arr, value) -> int:
+    """
+    Rank of the first value >= value.
+
+    Args:
+        arr: sorted array or index (see module docstring)
+        value: value to rank
+
+    Returns:
+        int: index where value would be inserted before equal values,
+            len(arr) if every value is smaller
+    """
+    return _ranker(arr, False)(value)
+
+
+def upper_bound(arr, value) -> int:
+    """
+    Rank of the first value > value.
+
+    Args:
+        arr: sorted array or index (see module docstring)
+        value: value to rank
+
+    Returns:
+        int: index where value would be inserted after equal values,
+            len(arr) if no value is larger
+    """
+    return _ranker(arr, True)(value)
+
+
+def count_range(arr, lo, hi) -> int:
+    """
+    Count the values v with lo <= v <= hi in O(log n).
+
+    Args:
+        arr: sorted array or index (see module docstring)
+        lo: smallest value counted
+        hi: largest value counted
+
+    Returns:
+        int: number of values in range, 0 if lo > hi
+    """
+    return max(upper_bound(arr, hi) - lower_bound(arr, lo), 0)
+
+
+class ListView(Sequence):
+    """Read only window over a slice of a list, no values are copied."""
+
+    def __init__(self, values: list, start: int, stop: int) -> None:
+        self._values = values
+        self._start = start
+        self._stop = max(stop, start)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return ListView(self._values, self._start + start, self._start + stop)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ListView index out of range")
+        return self._values[self._start + index]
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __iter__(self):
+        values = self._values
+        for i in range(self._start, self._stop):
+            yield values[i]
+
+    def __repr__(self) -> str:
+        return f"ListView({list(self)!r})"
+
+
+def range_view(arr, lo, hi):
+    """
+    The values v with lo <= v <= hi, without copying them.
+
+    Args:
+        arr: sorted array or index (see module docstring)
+        lo: smallest value included
+        hi: largest value included
+
+    Raises:
+        TypeError: If arr is a SortedIndex, its Eytzinger layout has no
+            contiguous sorted run to view (count it or use the source
+            array instead).
+
+    Returns:
+        NumPy slice for NumPy arrays, memoryview for array.array and
+        other buffers, ListView for lists and tuples, an iterator for
+        SortedList. All share memory with arr, so they see later changes
+        and should not outlive changes that move values.
+    """
+    if hasattr(arr, 'upper_bound'):
+        raise TypeError("SortedIndex keeps no sorted run to view, view its source array")
+    if hasattr(arr, 'irange'): #SortedList
+        return arr.irange(lo, hi)
+    start = lower_bound(arr, lo)
+    stop = max(upper_bound(arr, hi), start)
+    if isinstance(arr, np.ndarray):
+        return arr[start:stop]
+    if isinstance(arr, (list, tuple)):
+        return ListView(arr, start, stop)
+    return memoryview(arr)[start:stop]
+
+
+def _rank_many(arr, values, strict: bool) -> np.ndarray:
+    """Ranks of many values, vectorized where arr allows it."""
+    if isinstance(arr, np.ndarray):
+        return np.searchsorted(arr, np.asarray(values), 'right' if strict else 'left')
+    if hasattr(arr, 'upper_bound_many'): #SortedIndex
+        return arr.upper_bound_many(values) if strict else arr.lower_bound_many(values)
+    rank = _ranker(arr, strict)
+    return np.fromiter((rank(value) for value in values), dtype=np.int64,
+                       count=len(values))
+
+
+def lower_bound_many(arr, values) -> np.ndarray:
+    """
+    Batched lower_bound.
+
+    Args:
+        arr: sorted array or index (see module docstring)
+        values: values to rank, a sequence or NumPy array
+
+    Returns:
+        np.ndarray: rank of the first value >= each value
+    """
+    return _rank_many(arr, values, False)
+
+
+def upper_bound_many(arr, values) -> np.ndarray:
+    """
+    Batched upper_bound.
+
+    Args:
+        arr: sorted array or index (see module docstring)
+        values: values to rank, a sequence or NumPy array
+
+    Returns:
+        np.ndarray: rank of the first value > each value
+    """
+    return _rank_many(arr, values, True)
+
+
+def range_bounds_many(arr, los, his) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index bounds of many ranges [lo, hi].
+
+    Args:
+        arr: sorted array or index (see module docstring)
+        los: smallest value of each range
+        his: largest value of each range, same length as los
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: starts and stops, arr[start:stop]
+            holds each range's values (stop == start when empty)
+    """
+    starts = lower_bound_many(arr, los)
+    stops = np.maximum(upper_bound_many(arr, his), starts)
+    return starts, stops
+
+
+def count_range_many(arr, los, his) -> np.ndarray:
+    """
+    Batched count_range.
+
+    Args:
+        arr: sorted array or index (see module docstring)
+        los: smallest value of each range
+        his: largest value of each range, same length as los
+
+    Returns:
+        np.ndarray: number of values in each range
+    """
+    starts, stops = range_bounds_many(arr, los, his)
+    return stops - starts
+
+
+def range_views_many(arr, los, his) -> List:
+    """
+    Batched range_view for sorted arrays (not SortedIndex or SortedList).
+
+    Args:
+        arr: sorted list, tuple, NumPy array or buffer
+        los: smallest value of each range
+        his: largest value of each range, same length as los
+
+    Returns:
+        List: one zero copy view per range, as range_view returns
+    """
+    starts, stops = range_bounds_many(arr, los, his)
+    if isinstance(arr, np.ndarray):
+        return [arr[start:stop] for start, stop in zip(starts, stops)]
+    if isinstance(arr, (list, tuple)):
+        return [ListView(arr, int(start), int(stop)) for start, stop in zip(starts, stops)]
+    view = memoryview(arr)
+    return [view[start:stop] for start, stop in zip(starts, stops)]
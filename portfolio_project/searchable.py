@@ -0,0 +1,295 @@
+"""
+Collection that picks its own search strategy from how it is used.
+
+This module provides a SearchableCollection class holding values in
+insertion order. Lookups start as linear scans, which need no set up,
+and switch to an index once scanning has cost more than building it:
+
+- 'scan': linear scan, a hit at position i costs i + 1 comparisons and
+  a miss costs n
+- 'sorted': positions sorted by value plus binary search, built in about
+  n log2 n comparisons, then log2 n per lookup
+- 'hash': dict of value -> first position, built in n steps, then O(1)
+  per lookup (values must be hashable)
+
+Values that cannot be ordered get the hash index instead of the sorted
+one, values that cannot be hashed either keep scanning.
+
+Switching once scan cost reaches build cost never spends more than twice
+what the best fixed choice would have (the rent or buy argument), with
+no tuning for the workload. Appends and pops from the end update a
+built index in place, other changes move positions, so they drop the
+index and scanning starts over.
+"""
+
+import math
+import time
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+STRATEGIES = ('sorted', 'hash')
+
+
+class SearchStats(NamedTuple):
+    """How a SearchableCollection has searched so far."""
+    strategy: str           # 'scan', 'sorted' or 'hash', what find uses now
+    queries: int            # lookups answered in total
+    scan_cost: int          # comparisons spent scanning since the last build
+    build_cost: int         # comparisons the active (or next) index costs to build
+    builds: int             # indexes built
+    build_seconds: float    # time spent building indexes
+    invalidations: int      # indexes dropped by changes
+
+
+class SearchableCollection:
+    """
+    List like collection with adaptive find.
+
+    find returns the first position of a value or -1, like linear_search,
+    using a scan until repeated lookups justify building an index.
+    """
+
+    def __init__(self, iterable: Optional[Iterable] = None,
+                 index: str = 'sorted') -> None:
+        """
+        Initialize the collection.
+
+        Args:
+            iterable (Iterable, optional): initial values, in order
+            index (str): index to build, 'sorted' or 'hash'
+
+        Raises:
+            ValueError: If index is not a known strategy.
+
+        Returns:
+            None
+        """
+        if index not in STRATEGIES:
+            raise ValueError(f"index must be one of {STRATEGIES}, not {index!r}")
+        self._index = index
+        #index the next build makes, None when the values allow neither
+        self._index_kind: Optional[str] = index
+        self._values: list = list(iterable) if iterable is not None else []
+        self._strategy = 'scan'
+        #sorted index: values ascending and their positions, ties by position
+        self._keys: list = []
+        self._positions: List[int] = []
+        #hash index: value -> first position
+        self._first: dict = {}
+        self._queries = 0
+        self._scan_cost = 0
+        self._builds = 0
+        self._build_seconds = 0.0
+        self._invalidations = 0
+
+    def _build_cost(self) -> int:
+        """Comparisons to build the configured index over the current values."""
+        n = len(self._values)
+        if self._index_kind is None:
+            return 0
+        if self._index_kind == 'hash':
+            return n
+        return math.ceil(n * math.log2(n)) if n > 1 else n
+
+    def _build(self) -> None:
+        """Build the configured index and switch find to it. Values that
+        cannot be sorted fall back to hashing, values that cannot be hashed
+        keep scanning."""
+        start = time.perf_counter()
+        values = self._values
+        self._scan_cost = 0
+        try:
+            if self._index_kind == 'sorted':
+                #stable, so equal values keep their positions ascending
+                positions = sorted(range(len(values)), key=values.__getitem__)
+                self._keys = [values[position] for position in positions]
+                self._positions = positions
+            else:
+                first: dict = {}
+                for position, value in enumerate(values):
+                    first.setdefault(value, position)
+                self._first = first
+        except TypeError:
+            self._index_kind = 'hash' if self._index_kind == 'sorted' else None
+            if self._index_kind is not None:
+                self._build()
+            return
+        self._build_seconds += time.perf_counter() - start
+        self._builds += 1
+        self._strategy = self._index_kind
+
+    def _drop_index(self) -> None:
+        """Go back to scanning, the next build starts from the configured
+        index again."""
+        self._strategy = 'scan'
+        self._index_kind = self._index
+        self._keys, self._positions, self._first = [], [], {}
+        self._scan_cost = 0
+
+    def _invalidate(self) -> None:
+        """Drop the index after a change that moves positions."""
+        if self._strategy != 'scan':
+            self._invalidations += 1
+        self._drop_index()
+
+    def _scan(self, value) -> int:
+        """First position of value by linear scan, -1 if missing."""
+        for i, element in enumerate(self._values):
+            if element == value:
+                return i
+        return -1
+
+    def find(self, value) -> int:
+        """
+        First position of value.
+
+        Args:
+            value: value to look for
+
+        Returns:
+            int: index of the first occurrence of value, -1 if missing
+        """
+        self._queries += 1
+        try:
+            if self._strategy == 'sorted':
+                i = bisect_left(self._keys, value)
+                if i < len(self._keys) and self._keys[i] == value:
+                    return self._positions[i]
+                return -1
+            if self._strategy == 'hash':
+                return self._first.get(value, -1)
+        except TypeError: #value the index cannot order or hash
+            return self._scan(value)
+        position = self._scan(value)
+        self._scan_cost += position + 1 if position != -1 else len(self._values)
+        if self._index_kind is not None and self._scan_cost >= self._build_cost():
+            self._build()
+        return position
+
+    def __contains__(self, value) -> bool:
+        return self.find(value) != -1
+
+    def append(self, value) -> None:
+        """
+        Add value at the end, updating an index in place.
+
+        Args:
+            value: value to add
+
+        Returns:
+            None
+        """
+        position = len(self._values)
+        self._values.append(value)
+        try:
+            if self._strategy == 'sorted':
+                #after equal values, whose positions are smaller
+                i = bisect_right(self._keys, value)
+                self._keys.insert(i, value)
+                self._positions.insert(i, position)
+            elif self._strategy == 'hash':
+                self._first.setdefault(value, position)
+        except TypeError: #value the index cannot order or hash
+            kind = self._index_kind
+            self._drop_index()
+            self._index_kind = 'hash' if kind == 'sorted' else None
+            if self._index_kind is not None:
+                self._build()
+
+    def extend(self, iterable: Iterable) -> None:
+        """
+        Add many values at the end. Batches larger than the collection
+        drop the index instead, rebuilding costs less than inserting.
+
+        Args:
+            iterable (Iterable): values to add
+
+        Returns:
+            None
+        """
+        values = list(iterable)
+        if self._strategy == 'sorted' and len(values) > len(self._values):
+            self._values.extend(values)
+            self._invalidate()
+            return
+        for value in values:
+            self.append(value)
+
+    def __setitem__(self, index: int, value) -> None:
+        self._values[index] = value
+        self._invalidate()
+
+    def _is_last(self, index) -> bool:
+        """Check if index names the last position (no others move)."""
+        n = len(self._values)
+        return isinstance(index, int) and n > 0 and index in (-1, n - 1)
+
+    def _remove_last(self):
+        """Remove the last value, updating an index in place."""
+        position = len(self._values) - 1
+        value = self._values.pop()
+        if self._strategy == 'sorted':
+            #the largest position among equal values, so the end of their run
+            i = bisect_right(self._keys, value) - 1
+            del self._keys[i]
+            del self._positions[i]
+        elif self._strategy == 'hash' and self._first.get(value) == position:
+            del self._first[value]
+        return value
+
+    def __delitem__(self, index: int) -> None:
+        if self._is_last(index):
+            self._remove_last()
+            return
+        del self._values[index]
+        self._invalidate()
+
+    def insert(self, index: int, value) -> None:
+        """Insert value before index, positions after it move."""
+        self._values.insert(index, value)
+        self._invalidate()
+
+    def pop(self, index: int = -1):
+        """Remove and return the value at index (default last). Popping
+        the last value keeps the index."""
+        if self._is_last(index):
+            return self._remove_last()
+        value = self._values.pop(index)
+        self._invalidate()
+        return value
+
+    def remove(self, value) -> None:
+        """
+        Remove the first occurrence of value.
+
+        Raises:
+            ValueError: If value is not in the collection.
+        """
+        position = self.find(value)
+        if position == -1:
+            raise ValueError(f"{value!r} not in SearchableCollection")
+        del self[position]
+
+    def stats(self) -> SearchStats:
+        """
+        Report the active strategy and what searching has cost.
+
+        Returns:
+            SearchStats: strategy, query count, scan and build costs in
+                comparisons, builds, build seconds and invalidations
+        """
+        return SearchStats(self._strategy, self._queries, self._scan_cost,
+                           self._build_cost(), self._builds, self._build_seconds,
+                           self._invalidations)
+
+    def __getitem__(self, index: int):
+        return self._values[index]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator:
+        return iter(self._values)
+
+    def __repr__(self) -> str:
+        return f"SearchableCollection({self._values!r}, strategy={self._strategy!r})"
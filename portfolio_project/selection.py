@@ -0,0 +1,141 @@
+"""
+Selection algorithms for jobs that only need part of the sorted order.
+
+- select: put the k-th smallest element at index k (introselect)
+- partial_sort: sort only the k smallest elements into arr[:k]
+- nsmallest: return the k smallest elements in ascending order
+
+All work in place and avoid a full O(n log n) sort: select runs in
+expected O(n) (quickselect) with a median of medians fallback that
+keeps the worst case O(n), partial_sort and nsmallest in O(n + k log k).
+"""
+
+from typing import Tuple
+
+from dispatch import sort
+from function_timer import timer
+from sort_algos import binary_insertion
+
+# ranges this short are finished with insertion sort
+SMALL_RANGE = 16
+
+
+def _partition3(arr: list, lo: int, hi: int, pivot) -> Tuple[int, int]:
+    """Three way partition of arr[lo:hi] around pivot.
+
+    Returns:
+        Tuple[int, int]: (lt, gt) with arr[lo:lt] < pivot,
+            arr[lt:gt] == pivot and arr[gt:hi] > pivot
+    """
+    lt, i, gt = lo, lo, hi
+    while i < gt:
+        item = arr[i]
+        if item < pivot:
+            arr[lt], arr[i] = item, arr[lt]
+            lt += 1
+            i += 1
+        elif pivot < item:
+            gt -= 1
+            arr[i], arr[gt] = arr[gt], item
+        else:
+            i += 1
+    return lt, gt
+
+
+def _median_of_medians(arr: list, lo: int, hi: int):
+    """Pivot value guaranteed to split arr[lo:hi] at least 30 / 70."""
+    medians = []
+    for start in range(lo, hi, 5):
+        group = sorted(arr[start:min(start + 5, hi)])
+        medians.append(group[len(group) // 2])
+    middle = len(medians) // 2
+    _introselect(medians, 0, len(medians), middle, 2 * len(medians).bit_length())
+    return medians[middle]
+
+
+def _introselect(arr: list, lo: int, hi: int, k: int, depth: int) -> None:
+    """Move the k-th smallest of arr[lo:hi] to index k.
+
+    Uses median of three pivots until `depth` runs out, then median of
+    medians pivots for the rest.
+    """
+    while hi - lo > SMALL_RANGE:
+        if depth > 0:
+            depth -= 1
+            mid = (lo + hi - 1) // 2
+            pivot = sorted((arr[lo], arr[mid], arr[hi - 1]))[1]
+        else:
+            #too many bad pivots, fall back to a guaranteed split
+            pivot = _median_of_medians(arr, lo, hi)
+        lt, gt = _partition3(arr, lo, hi, pivot)
+        if k < lt:
+            hi = lt
+        elif k >= gt:
+            lo = gt
+        else:
+            return #k landed among the elements equal to pivot
+    binary_insertion(arr, lo, hi)
+
+
+@timer #wrapper
+def select(arr: list, k: int):
+    """Rearrange arr in place so arr[k] is its k-th smallest element.
+
+    Afterwards every element of arr[:k] is <= arr[k] and every element
+    of arr[k + 1:] is >= arr[k]. Runs in expected O(n) with introselect.
+
+    Args:
+        arr (list): list to rearrange in place
+        k (int): 0 based rank to select, 0 <= k < len(arr)
+
+    Raises:
+        IndexError: If k is outside the list.
+
+    Returns:
+        The k-th smallest element
+    """
+    if not 0 <= k < len(arr):
+        raise IndexError("select rank out of range")
+    _introselect(arr, 0, len(arr), k, 2 * len(arr).bit_length())
+    return arr[k]
+
+
+@timer #wrapper
+def partial_sort(arr: list, k: int) -> None:
+    """Sort the k smallest elements of arr into arr[:k], in place.
+
+    Select the k-th smallest so the k smallest are in front, then sort
+    only that prefix. The order of arr[k:] is unspecified.
+
+    Args:
+        arr (list): list to rearrange in place
+        k (int): number of smallest elements to sort into the front
+
+    Returns:
+        None
+    """
+    k = min(k, len(arr))
+    if k <= 0:
+        return
+    if k < len(arr):
+        _introselect(arr, 0, len(arr), k - 1, 2 * len(arr).bit_length())
+    head = arr[:k]
+    sort(head)
+    arr[:k] = head
+
+
+@timer #wrapper
+def nsmallest(arr: list, k: int) -> list:
+    """Return the k smallest elements of arr in ascending order.
+
+    arr is rearranged in place as by partial_sort.
+
+    Args:
+        arr (list): list to search, rearranged in place
+        k (int): number of elements to return
+
+    Returns:
+        list: the k smallest elements, sorted
+    """
+    partial_sort(arr, k)
+    return arr[:max(k, 0)]
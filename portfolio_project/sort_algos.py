@@ -1,5 +1,77 @@
+import time
+from bisect import bisect_left, bisect_right
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
 from function_timer import timer
 
+# a bucket this small is finished with insertion sort, larger ones recurse
+BUCKET_INSERTION_LIMIT = 32
+
+def _extract_keys(func, items: list, key: Optional[Callable]) -> list:
+    """Compute the key of every item once, into a parallel list.
+
+    The seconds spent are stored as func.last_key_time so benchmarks can
+    report key cost apart from sort cost.
+
+    Args:
+        func: sort function to record the key time on
+        items (list): elements to compute keys for
+        key (Callable, optional): key function, None uses the items
+            themselves (no copy)
+
+    Returns:
+        list: key of each item, same order as items
+    """
+    start = time.perf_counter()
+    keys = items if key is None else [key(item) for item in items]
+    func.last_key_time = time.perf_counter() - start
+    return keys
+
+def keyed(func):
+    """
+    Add key= and reverse= arguments to a comparison sort.
+
+    With neither given the sort runs unchanged. Otherwise every key is
+    computed once into a parallel list and the sort runs on (key, index)
+    pairs (decorate-sort-undecorate), so elements are never compared
+    directly and equal keys keep their original order for every
+    algorithm. reverse=True sorts the reversed list then reverses the
+    result, which is stable in the same way as sorted(reverse=True).
+    Extra positional arguments are taken as merge_sort's inclusive
+    (first, last) index range. The wrapped sort's last_run is copied
+    over and the key / decorate cost is kept in last_key_time.
+    """
+    @wraps(func)
+    def wrapper(arr, *args, key: Optional[Callable] = None, reverse: bool = False):
+        if key is None and not reverse:
+            result = func(arr, *args)
+            wrapper.last_run = func.last_run
+            wrapper.last_key_time = 0.0
+            return result
+        start = time.perf_counter()
+        lo, hi = (args[0], args[1] + 1) if args else (0, len(arr))
+        items = arr[lo:hi]
+        if reverse:
+            items.reverse()
+        keys = items if key is None else [key(item) for item in items]
+        decorated = list(zip(keys, range(len(items))))
+        key_time = time.perf_counter() - start
+
+        func(decorated, *((0, len(decorated) - 1) if args else ()))
+        wrapper.last_run = func.last_run
+
+        start = time.perf_counter()
+        ordered = [items[i] for _, i in decorated]
+        if reverse:
+            ordered.reverse()
+        arr[lo:hi] = ordered
+        wrapper.last_key_time = key_time + time.perf_counter() - start
+    wrapper.last_run = None
+    wrapper.last_key_time = None
+    return wrapper
+
+@keyed
 @timer #wrapper
 def selection_sort(arr: list[int]) -> None: 
     """Sort a list of integers in in place with selection sort.
@@ -24,14 +96,50 @@ def selection_sort(arr: list[int]) -> None:
         #tuple swap when smaller element found
         arr[i], arr[index_min] = arr[index_min], arr[i]
 
+def binary_insertion(arr: list, lo: int = 0, hi: Optional[int] = None,
+                     stable: bool = True) -> None:
+    """Insertion sort arr[lo:hi] in place, the engine behind every
+    insertion_sort.
+
+    Each element already in order with its left neighbour is skipped
+    with one comparison, so nearly sorted input stays O(n). Otherwise
+    its insertion point is found with a binary search and the larger
+    elements are moved right with one slice assignment instead of one
+    swap per position.
+
+    Args:
+        arr (list): list to sort, modified in place
+        lo (int): first index to sort. Defaults to 0
+        hi (int, optional): one past the last index to sort.
+            Defaults to len(arr)
+        stable (bool): insert after equal elements so they keep their
+            order (bisect_right). False inserts before them (bisect_left)
+
+    Returns:
+        None
+    """
+    if hi is None:
+        hi = len(arr)
+    find = bisect_right if stable else bisect_left
+    for i in range(lo + 1, hi):
+        item = arr[i]
+        if not item < arr[i - 1]:
+            continue
+        pos = find(arr, item, lo, i)
+        #shift the block arr[pos:i] one place right in one move
+        arr[pos + 1:i + 1] = arr[pos:i]
+        arr[pos] = item
+
+@keyed
 @timer #wrapper
 def insertion_sort(arr: list[int]) -> None:
     """Sort a list of integers in ascending order, in place.
 
     This function implements insertion sort by iterating from 
     the second element to the end of the list and inserting each
-    element into the already sorted part by shifting larger values 
-    one place to the right until in correct position. 
+    element into the already sorted part. The insertion point is found
+    with binary search and larger values are shifted one place to the
+    right as a block (see binary_insertion).
 
     Args:
         arr (list[int]): The list of integers to sort, modified in 
@@ -40,14 +148,7 @@ def insertion_sort(arr: list[int]) -> None:
     Returns:
         None
     """
-    for i in range(1, len(arr)):
-        j = i
-        # Shift element at arr[j] left until in correct position
-        while j > 0 and arr[j] < arr[j - 1]:
-            #Swap element j and j-1 when not in correct position
-            arr[j], arr[j - 1] = arr[j-1], arr[j]
-            j -= 1
-
+    binary_insertion(arr)
 
 def merge(arr: list[int], i: int, j: int, k: int) -> None:
     """Merge two sublist of arr in place.
@@ -94,6 +195,7 @@ def merge(arr: list[int], i: int, j: int, k: int) -> None:
     for merge_pos in range(merged_size):
         arr[i + merge_pos] = merged_numbers[merge_pos]
 
+@keyed
 @timer #wrapper
 def merge_sort(arr: list[int], i: int, k: int):
     """Recursively sort arr[i-k] in place with merge sort.
@@ -120,6 +222,7 @@ def merge_sort(arr: list[int], i: int, k: int):
         #Merge the list parts into sorted order
         merge(arr, i, j, k)
 
+@keyed
 @timer #wrapper
 def bubble_sort(arr: list[int]) -> None:
     """Sort a list of integers in place using bubble sort.
@@ -141,4 +244,347 @@ def bubble_sort(arr: list[int]) -> None:
         for j in range(0, size - i -1):
             if arr[j] > arr[j+1]:
                 #swap items that are in wrong position
-                arr[j], arr[j+1] = arr[j+1], arr[j]
\ No newline at end of file
+                arr[j], arr[j+1] = arr[j+1], arr[j]
+
+
+def key_range(keys: list[int]) -> Tuple[int, int]:
+    """Find the smallest and largest key in a list.
+
+    min and max each run as one C level scan, which is cheaper than
+    one Python loop tracking both.
+
+    Args:
+        keys (list[int]): keys to scan, must not be empty
+
+    Returns:
+        Tuple[int, int]: (smallest key, largest key)
+    """
+    return min(keys), max(keys)
+
+@timer #wrapper
+def counting_sort(arr: list, key: Optional[Callable] = None,
+                  reverse: bool = False) -> None:
+    """Sort a list of integers, or records by an integer key, in place
+    with counting sort.
+
+    Count how often each key between min and max appears, then write
+    the elements back in key order. Runs in O(n + k) where k is the key
+    range, so only use when k is not much larger than n. With a key
+    function records are placed by prefix sums of the counts which
+    keeps records with equal keys in their original order (stable).
+
+    Args:
+        arr (list): list of integers, or records when key is given,
+            sorted in place
+        key (Callable, optional): function returning an integer key
+            for each record. Defaults to None (sort the integers)
+        reverse (bool): sort descending, equal keys keep their order
+
+    Returns:
+        None
+    """
+    if len(arr) < 2:
+        return
+    if reverse:
+        #stable descending = reverse of stable ascending of reversed list
+        arr.reverse()
+    keys = _extract_keys(counting_sort, arr, key)
+    low, high = key_range(keys)
+    counts = [0] * (high - low + 1)
+    for k in keys:
+        counts[k - low] += 1
+
+    if key is None:
+        #write each integer back as many times as it was counted
+        pos = 0
+        for offset, count in enumerate(counts):
+            if count:
+                arr[pos:pos + count] = [low + offset] * count
+                pos += count
+    else:
+        #turn counts into the first output index of each key
+        start = 0
+        for offset, count in enumerate(counts):
+            counts[offset] = start
+            start += count
+        placed = [None] * len(arr)
+        for item, k in zip(arr, keys):
+            placed[counts[k - low]] = item
+            counts[k - low] += 1
+        arr[:] = placed
+    if reverse:
+        arr.reverse()
+counting_sort.last_key_time = None
+
+def _bucket_sort(items: list, keys: list[int]) -> Tuple[list, list[int]]:
+    """Stable bucket sort of items by their integer keys.
+
+    Args:
+        items (list): elements to sort
+        keys (list[int]): key of each element, same length as items
+
+    Returns:
+        Tuple[list, list[int]]: the sorted items and their keys
+    """
+    count = len(items)
+    low, high = key_range(keys)
+    span = high - low + 1
+    if span == 1:
+        return items, keys
+    item_buckets: list[list] = [[] for _ in range(count)]
+    key_buckets: list[list[int]] = [[] for _ in range(count)]
+    #spread elements evenly over n buckets by key
+    for item, k in zip(items, keys):
+        b = (k - low) * count // span
+        item_buckets[b].append(item)
+        key_buckets[b].append(k)
+
+    sorted_items: list = []
+    sorted_keys: list[int] = []
+    for bucket, bucket_keys in zip(item_buckets, key_buckets):
+        if len(bucket) > BUCKET_INSERTION_LIMIT:
+            #crowded bucket, its key range is smaller so recurse
+            bucket, bucket_keys = _bucket_sort(bucket, bucket_keys)
+        else:
+            #insertion sort on keys, only move when strictly smaller (stable)
+            for i in range(1, len(bucket)):
+                j = i
+                while j > 0 and bucket_keys[j] < bucket_keys[j - 1]:
+                    bucket_keys[j], bucket_keys[j - 1] = bucket_keys[j - 1], bucket_keys[j]
+                    bucket[j], bucket[j - 1] = bucket[j - 1], bucket[j]
+                    j -= 1
+        sorted_items.extend(bucket)
+        sorted_keys.extend(bucket_keys)
+    return sorted_items, sorted_keys
+
+@timer #wrapper
+def bucket_sort(arr: list, key: Optional[Callable] = None,
+                reverse: bool = False) -> None:
+    """Sort a list of integers, or records by an integer key, in place
+    with bucket sort.
+
+    Spread the elements over n buckets by where their key falls between
+    min and max, sort each bucket, then concatenate the buckets. Runs in
+    expected O(n + k) for evenly spread keys. Buckets keep insertion
+    order and are sorted stably so records with equal keys stay in
+    their original order.
+
+    Args:
+        arr (list): list of integers, or records when key is given,
+            sorted in place
+        key (Callable, optional): function returning an integer key
+            for each record. Defaults to None (sort the integers)
+        reverse (bool): sort descending, equal keys keep their order
+
+    Returns:
+        None
+    """
+    if len(arr) < 2:
+        return
+    if reverse:
+        #stable descending = reverse of stable ascending of reversed list
+        arr.reverse()
+    keys = list(_extract_keys(bucket_sort, arr, key))
+    arr[:] = _bucket_sort(list(arr), keys)[0]
+    if reverse:
+        arr.reverse()
+bucket_sort.last_key_time = None
+
+@keyed
+@timer #wrapper
+def natural_merge_sort(arr: list) -> None:
+    """Sort a list in place with an adaptive (natural) merge sort.
+
+    Split the list into the runs that are already in order, reversing
+    strictly descending runs, then merge neighbouring runs until one
+    is left. A sorted or reversed list is finished in O(n) and a list
+    made of r runs in O(n log r).
+
+    Args:
+        arr (list): list to be sorted in place
+
+    Returns:
+        None
+    """
+    size = len(arr)
+    if size < 2:
+        return
+    #find start index of every run
+    starts = []
+    i = 0
+    while i < size:
+        starts.append(i)
+        j = i + 1
+        if j < size and arr[j] < arr[i]:
+            #strictly descending run, reverse it so it ascends
+            while j < size and arr[j] < arr[j - 1]:
+                j += 1
+            arr[i:j] = arr[i:j][::-1]
+        else:
+            while j < size and arr[j] >= arr[j - 1]:
+                j += 1
+        i = j
+    starts.append(size)
+
+    #merge pairs of neighbouring runs until one run is left
+    while len(starts) > 2:
+        merged_starts = []
+        for r in range(0, len(starts) - 2, 2):
+            merge(arr, starts[r], starts[r + 1] - 1, starts[r + 2] - 1)
+            merged_starts.append(starts[r])
+        if len(starts) % 2 == 0:
+            #odd number of runs, last run waits for next round
+            merged_starts.append(starts[-2])
+        merged_starts.append(size)
+        starts = merged_starts
+
+def _sift_down(arr: list, lo: int, root: int, end: int) -> None:
+    """Move arr[lo + root] down the heap stored in arr[lo:lo + end]."""
+    while True:
+        child = 2 * root + 1
+        if child >= end:
+            return
+        if child + 1 < end and arr[lo + child] < arr[lo + child + 1]:
+            child += 1
+        if arr[lo + root] >= arr[lo + child]:
+            return
+        arr[lo + root], arr[lo + child] = arr[lo + child], arr[lo + root]
+        root = child
+
+def _heap_sort_range(arr: list, lo: int, hi: int) -> None:
+    """Heap sort arr[lo:hi] in place."""
+    size = hi - lo
+    for root in range(size // 2 - 1, -1, -1):
+        _sift_down(arr, lo, root, size)
+    for end in range(size - 1, 0, -1):
+        arr[lo], arr[lo + end] = arr[lo + end], arr[lo]
+        _sift_down(arr, lo, 0, end)
+
+def _intro_sort(arr: list, lo: int, hi: int, depth: int) -> None:
+    """Introsort arr[lo:hi], heap sort once depth reaches 0."""
+    while hi - lo > 16:
+        if depth == 0:
+            #too many bad pivots, heap sort keeps O(n log n)
+            _heap_sort_range(arr, lo, hi)
+            return
+        depth -= 1
+        #median of first, middle and last as pivot
+        mid = (lo + hi - 1) // 2
+        pivot = sorted((arr[lo], arr[mid], arr[hi - 1]))[1]
+        #Hoare partition around pivot
+        i, j = lo, hi - 1
+        while i <= j:
+            while arr[i] < pivot:
+                i += 1
+            while arr[j] > pivot:
+                j -= 1
+            if i <= j:
+                arr[i], arr[j] = arr[j], arr[i]
+                i += 1
+                j -= 1
+        #recurse into smaller side, loop on larger side
+        if j + 1 - lo < hi - i:
+            _intro_sort(arr, lo, j + 1, depth)
+            lo = i
+        else:
+            _intro_sort(arr, i, hi, depth)
+            hi = j + 1
+    #finish short ranges with insertion sort
+    binary_insertion(arr, lo, hi)
+
+@keyed
+@timer #wrapper
+def intro_sort(arr: list) -> None:
+    """Sort a list in place with introsort.
+
+    Quick sort with median of three pivots, switching to heap sort when
+    recursion gets deeper than 2 log2(n) so the worst case stays
+    O(n log n), and to insertion sort for ranges of 16 or fewer.
+
+    Args:
+        arr (list): list to be sorted in place
+
+    Returns:
+        None
+    """
+    if len(arr) < 2:
+        return
+    _intro_sort(arr, 0, len(arr), 2 * len(arr).bit_length())
+
+def _radix_order(order: list[int], field: list[int]) -> list[int]:
+    """Stable LSD radix sort of the indexes in order by field[index].
+
+    Args:
+        order (list[int]): indexes into field, in their current order
+        field (list[int]): integer key of every index
+
+    Returns:
+        list[int]: the indexes sorted by key, ties keep their order
+    """
+    low, high = key_range(field)
+    span = high - low
+    shift = 0
+    while span >> shift:
+        buckets: list[list[int]] = [[] for _ in range(256)]
+        for i in order:
+            buckets[((field[i] - low) >> shift) & 0xFF].append(i)
+        order = [i for bucket in buckets for i in bucket]
+        shift += 8
+    return order
+
+@timer #wrapper
+def radix_sort(arr: list, key: Optional[Callable] = None,
+               reverse: bool = False) -> None:
+    """Sort a list of integers, or records by an integer or fixed width
+    composite key, in place with LSD radix sort.
+
+    Keys are offset by the minimum so negatives need no extra pass,
+    then each pass puts the integers in 256 buckets by one byte of
+    the offset key and recombines them in bucket order. Every pass is
+    stable, so a composite key (a tuple of integers with the same number
+    of fields for every record) is sorted field by field starting with
+    the last, like digits.
+
+    Args:
+        arr (list): list of integers, or records when key is given,
+            sorted in place
+        key (Callable, optional): function returning an integer, or a
+            tuple of integers, for each record. Defaults to None (sort
+            the integers)
+        reverse (bool): sort descending, equal keys keep their order
+
+    Returns:
+        None
+    """
+    if len(arr) < 2:
+        return
+    if key is None and not reverse:
+        _extract_keys(radix_sort, arr, None)
+        low, high = key_range(arr)
+        span = high - low
+        shift = 0
+        while span >> shift:
+            buckets: list[list[int]] = [[] for _ in range(256)]
+            for num in arr:
+                buckets[((num - low) >> shift) & 0xFF].append(num)
+            #put integers back into list in bucket order
+            pos = 0
+            for bucket in buckets:
+                arr[pos:pos + len(bucket)] = bucket
+                pos += len(bucket)
+            shift += 8
+        return
+
+    if reverse:
+        #stable descending = reverse of stable ascending of reversed list
+        arr.reverse()
+    keys = _extract_keys(radix_sort, arr, key)
+    fields = list(zip(*keys)) if isinstance(keys[0], tuple) else [keys]
+    order = list(range(len(arr)))
+    #least significant field first
+    for field in reversed(fields):
+        order = _radix_order(order, field)
+    arr[:] = [arr[i] for i in order]
+    if reverse:
+        arr.reverse()
+radix_sort.last_key_time = None
@@ -0,0 +1,228 @@
+"""
+Read only search index over a sorted array in Eytzinger order.
+
+This module provides a SortedIndex class built once from sorted values.
+Binary search over a plain sorted array jumps across the whole array on
+every probe, so large arrays miss the cache on almost every step. The
+Eytzinger layout stores the values in breadth first order of the
+implicit search tree (root at 1, children of k at 2k and 2k + 1):
+
+- the first probes of every search hit the same few cache lines
+- the next probes are close together, k's grandchildren are adjacent
+- no pointers, the layout is one compact 8 byte per key buffer
+
+Lookups:
+
+- find: index of a value in the sorted order, -1 if missing
+- lower_bound / upper_bound: rank of the first value >= / > a value
+- find_many / lower_bound_many / upper_bound_many: batched lookups,
+  vectorized with NumPy so every level of the tree is one array
+  operation for all keys
+"""
+
+from array import array
+from typing import Iterable
+
+import numpy as np
+
+# array typecode sharing memory with each supported NumPy dtype
+_TYPECODES = {np.dtype(np.int64): 'q', np.dtype(np.float64): 'd'}
+
+
+def eytzinger_order(n: int) -> np.ndarray:
+    """
+    Eytzinger position of every rank in a sorted array of n values.
+
+    In order traversal of a perfect tree of height h visits node
+    (2^h + j) >> (t + 1) at step j, t being the trailing zeros of j.
+    Positions past n are leaves missing from the last level, dropping
+    them keeps the in order sequence of the nodes that remain.
+
+    Args:
+        n (int): number of values
+
+    Returns:
+        np.ndarray: order[i] is the 1 based layout position of rank i
+    """
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    top = 1 << n.bit_length()
+    steps = np.arange(1, top, dtype=np.int64)
+    lowest = steps & -steps #2^t
+    nodes = (top + steps) // (2 * lowest)
+    return nodes[nodes <= n]
+
+
+class SortedIndex:
+    """
+    Static search index over sorted numbers in Eytzinger order.
+
+    Provides find, lower_bound and upper_bound in O(log n) with cache
+    friendly probes, and vectorized batched forms of all three. Values
+    are int64 or float64, copied once when built.
+    """
+
+    def __init__(self, values: Iterable) -> None:
+        """
+        Build the index from values sorted ascending.
+
+        Args:
+            values (Iterable): sorted numbers, a list, array or NumPy array
+
+        Raises:
+            TypeError: If values are not numbers.
+            ValueError: If values are not sorted ascending.
+
+        Returns:
+            None
+        """
+        values = np.asarray(values if hasattr(values, '__len__') else list(values))
+        if values.ndim != 1:
+            raise ValueError("SortedIndex needs a one dimensional array")
+        if values.dtype.kind in 'iub':
+            values = values.astype(np.int64)
+        elif values.dtype.kind == 'f':
+            values = values.astype(np.float64)
+        elif len(values):
+            raise TypeError(f"SortedIndex holds numbers, not {values.dtype}")
+        else:
+            values = values.astype(np.int64)
+        if np.any(values[1:] < values[:-1]):
+            raise ValueError("SortedIndex needs values sorted ascending")
+        n = len(values)
+        order = eytzinger_order(n)
+        #position 0 is unused so the root is 1 and children are 2k, 2k + 1
+        self._keys = array(_TYPECODES[values.dtype], bytes(8 * (n + 1)))
+        self._ranks = array('q', bytes(8 * (n + 1)))
+        #NumPy views over the same buffers, for the batched lookups
+        self.keys = np.frombuffer(self._keys, dtype=values.dtype)
+        self.ranks = np.frombuffer(self._ranks, dtype=np.int64)
+        self.keys[order] = values
+        self.ranks[order] = np.arange(n, dtype=np.int64)
+        self._len = n
+
+    def _descend(self, value, strict: bool) -> int:
+        """Layout position of the first value >= value (> if strict),
+        0 if there is none."""
+        keys = self._keys
+        n = self._len
+        k = 1
+        if strict:
+            while k <= n:
+                k = 2 * k + (keys[k] <= value)
+        else:
+            while k <= n:
+                k = 2 * k + (keys[k] < value)
+        #undo the right turns taken after the answer, then its left turn
+        return k >> ((~k & (k + 1)).bit_length())
+
+    def lower_bound(self, value) -> int:
+        """
+        Rank of the first value >= value.
+
+        Args:
+            value: number to look for
+
+        Returns:
+            int: index into the sorted values, len(self) if every value
+                is smaller
+        """
+        k = self._descend(value, False)
+        return self._ranks[k] if k else self._len
+
+    def upper_bound(self, value) -> int:
+        """
+        Rank of the first value > value.
+
+        Args:
+            value: number to look for
+
+        Returns:
+            int: index into the sorted values, len(self) if no value is
+                larger
+        """
+        k = self._descend(value, True)
+        return self._ranks[k] if k else self._len
+
+    def find(self, value) -> int:
+        """
+        Index of value in the sorted values, same contract as
+        binary_search.
+
+        Args:
+            value: number to look for
+
+        Returns:
+            int: index of the first copy of value, -1 if missing
+        """
+        k = self._descend(value, False)
+        return self._ranks[k] if k and self._keys[k] == value else -1
+
+    def _descend_many(self, values: np.ndarray, strict: bool = False) -> np.ndarray:
+        """Layout positions of the first value >= (> if strict) every value,
+        0 if none."""
+        n = self._len
+        k = np.ones(len(values), dtype=np.int64)
+        if n == 0:
+            return k * 0
+        #every key takes one step per level, finished keys stay put
+        for _ in range(n.bit_length()):
+            active = k <= n
+            probe = self.keys[np.where(active, k, 1)]
+            step = probe <= values if strict else probe < values
+            k = np.where(active, 2 * k + step, k)
+        return k // (2 * (~k & (k + 1)))
+
+    def lower_bound_many(self, values) -> np.ndarray:
+        """
+        Batched lower_bound.
+
+        Args:
+            values: numbers to look for, any sequence or NumPy array
+
+        Returns:
+            np.ndarray: rank of the first value >= each value
+        """
+        k = self._descend_many(np.asarray(values))
+        return np.where(k > 0, self.ranks[k], self._len)
+
+    def upper_bound_many(self, values) -> np.ndarray:
+        """
+        Batched upper_bound.
+
+        Args:
+            values: numbers to look for, any sequence or NumPy array
+
+        Returns:
+            np.ndarray: rank of the first value > each value
+        """
+        k = self._descend_many(np.asarray(values), True)
+        return np.where(k > 0, self.ranks[k], self._len)
+
+    def find_many(self, values) -> np.ndarray:
+        """
+        Batched find, same contract as search_many.
+
+        Args:
+            values: numbers to look for, any sequence or NumPy array
+
+        Returns:
+            np.ndarray: index of each value, -1 where it is missing
+        """
+        values = np.asarray(values)
+        k = self._descend_many(values)
+        found = (k > 0) & (self.keys[k] == values)
+        return np.where(found, self.ranks[k], -1)
+
+    def __contains__(self, value) -> bool:
+        return self.find(value) != -1
+
+    def __len__(self) -> int:
+        return self._len
+
+    def nbytes(self) -> int:
+        """Bytes used by the layout and rank buffers."""
+        return self.keys.nbytes + self.ranks.nbytes
+
+    def __repr__(self) -> str:
+        return f"SortedIndex(n={self._len}, dtype={self.keys.dtype})"
@@ -0,0 +1,298 @@
+"""
+Sorted container for append heavy workloads.
+
+This module provides a SortedList class that keeps its values sorted
+as they are added, so data never has to be fully re-sorted:
+
+- add / remove / discard / membership in O(log n)
+- rank (bisect_left / bisect_right) and positional indexing in O(log n)
+- irange: iterate the values between two bounds
+- bulk load from an unsorted iterable with dispatch.sort
+
+Values are stored as a list of sorted chunks holding at most 2 * load
+values each, plus the maximum of every chunk (to find a value's chunk
+by binary search) and a Fenwick tree of chunk lengths (to turn chunk
+positions into ranks).
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from dispatch import sort
+
+# target chunk size, chunks are split once they reach twice this
+DEFAULT_LOAD = 1000
+
+
+class SortedList:
+    """
+    List that keeps its values in ascending order.
+
+    Provides O(log n) insert, delete, membership, rank and indexing,
+    and range iteration between two values.
+    """
+
+    def __init__(self, iterable: Optional[Iterable] = None,
+                 load: int = DEFAULT_LOAD) -> None:
+        """
+        Initialize a sorted list, bulk loading any given values.
+
+        Args:
+            iterable (Iterable, optional): unsorted values to load
+            load (int): target number of values per chunk
+
+        Returns:
+            None
+        """
+        self._load = load
+        self._lists: List[list] = []
+        self._maxes: list = []
+        self._tree: Optional[List[int]] = None
+        self._len = 0
+        if iterable is not None:
+            self.update(iterable)
+
+    def _reset(self, values: list) -> None:
+        """Rebuild every chunk from a sorted list of values."""
+        load = self._load
+        self._lists = [values[i:i + load] for i in range(0, len(values), load)]
+        self._maxes = [chunk[-1] for chunk in self._lists]
+        self._tree = None
+        self._len = len(values)
+
+    def _build_tree(self) -> List[int]:
+        """Build the Fenwick tree of chunk lengths in O(number of chunks)."""
+        tree = [0] + [len(chunk) for chunk in self._lists]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+        return tree
+
+    def _tree_add(self, pos: int, delta: int) -> None:
+        """Add delta to the length of chunk pos in the Fenwick tree."""
+        tree = self._tree
+        if tree is None:
+            return
+        i = pos + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, pos: int) -> int:
+        """Number of values in the chunks before chunk pos."""
+        tree = self._tree or self._build_tree()
+        total = 0
+        i = pos
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, index: int) -> Tuple[int, int]:
+        """Turn a position into (chunk, offset) by descending the tree."""
+        tree = self._tree or self._build_tree()
+        pos = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(tree) and tree[nxt] <= index:
+                index -= tree[nxt]
+                pos = nxt
+            step >>= 1
+        return pos, index
+
+    def _split(self, pos: int) -> None:
+        """Split chunk pos in half once it grows past 2 * load."""
+        chunk = self._lists[pos]
+        half = chunk[self._load:]
+        del chunk[self._load:]
+        self._lists.insert(pos + 1, half)
+        self._maxes.insert(pos, chunk[-1])
+        self._tree = None
+
+    def add(self, value) -> None:
+        """
+        Insert value, keeping the list sorted (after equal values).
+
+        Args:
+            value: value to insert
+
+        Returns:
+            None
+        """
+        if not self._lists:
+            self._lists.append([value])
+            self._maxes.append(value)
+            self._tree = None
+            self._len = 1
+            return
+        pos = bisect_right(self._maxes, value)
+        if pos == len(self._maxes):
+            #larger than everything, goes on the end of the last chunk
+            pos -= 1
+            self._lists[pos].append(value)
+            self._maxes[pos] = value
+        else:
+            insort(self._lists[pos], value)
+        self._tree_add(pos, 1)
+        self._len += 1
+        if len(self._lists[pos]) > 2 * self._load:
+            self._split(pos)
+
+    def update(self, iterable: Iterable) -> None:
+        """
+        Add many values at once.
+
+        Large batches are merged with the current values and sorted
+        with dispatch.sort in one go instead of one add per value.
+
+        Args:
+            iterable (Iterable): values to add
+
+        Returns:
+            None
+        """
+        values = list(iterable)
+        if len(values) * 4 < self._len:
+            for value in values:
+                self.add(value)
+            return
+        values = list(chain.from_iterable(self._lists)) + values
+        sort(values)
+        self._reset(values)
+
+    def discard(self, value) -> bool:
+        """
+        Remove one occurrence of value if present.
+
+        Args:
+            value: value to remove
+
+        Returns:
+            bool: True if a value was removed
+        """
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return False
+        chunk = self._lists[pos]
+        idx = bisect_left(chunk, value)
+        if chunk[idx] != value:
+            return False
+        del chunk[idx]
+        self._len -= 1
+        if not chunk:
+            del self._lists[pos]
+            del self._maxes[pos]
+            self._tree = None
+        else:
+            self._maxes[pos] = chunk[-1]
+            self._tree_add(pos, -1)
+        return True
+
+    def remove(self, value) -> None:
+        """
+        Remove one occurrence of value.
+
+        Args:
+            value: value to remove
+
+        Raises:
+            ValueError: If value is not in the list.
+
+        Returns:
+            None
+        """
+        if not self.discard(value):
+            raise ValueError(f"{value!r} not in SortedList")
+
+    def __contains__(self, value) -> bool:
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return False
+        chunk = self._lists[pos]
+        return chunk[bisect_left(chunk, value)] == value
+
+    def bisect_left(self, value) -> int:
+        """
+        Rank of value: number of values strictly less than it.
+
+        Args:
+            value: value to rank
+
+        Returns:
+            int: index where value would be inserted before equal values
+        """
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._prefix(pos) + bisect_left(self._lists[pos], value)
+
+    rank = bisect_left
+
+    def bisect_right(self, value) -> int:
+        """
+        Number of values less than or equal to value.
+
+        Args:
+            value: value to rank
+
+        Returns:
+            int: index where value would be inserted after equal values
+        """
+        pos = bisect_right(self._maxes, value)
+        if pos == len(self._maxes):
+            return self._len
+        return self._prefix(pos) + bisect_right(self._lists[pos], value)
+
+    def count(self, value) -> int:
+        """Return how many times value occurs."""
+        return self.bisect_right(value) - self.bisect_left(value)
+
+    def __getitem__(self, index: int):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("SortedList index out of range")
+        pos, offset = self._locate(index)
+        return self._lists[pos][offset]
+
+    def irange(self, minimum=None, maximum=None,
+               inclusive: Tuple[bool, bool] = (True, True)) -> Iterator:
+        """
+        Iterate the values between minimum and maximum in order.
+
+        Args:
+            minimum: lower bound, None for no lower bound
+            maximum: upper bound, None for no upper bound
+            inclusive (Tuple[bool, bool]): whether each bound is included
+
+        Returns:
+            Iterator: the values in range, ascending
+        """
+        if minimum is None:
+            pos, idx = 0, 0
+        else:
+            find = bisect_left if inclusive[0] else bisect_right
+            pos = find(self._maxes, minimum)
+            if pos == len(self._maxes):
+                return
+            idx = find(self._lists[pos], minimum)
+        for chunk in self._lists[pos:]:
+            for value in chunk[idx:]:
+                if maximum is not None and (
+                        maximum < value or (not inclusive[1] and value == maximum)):
+                    return
+                yield value
+            idx = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        return chain.from_iterable(self._lists)
+
+    def __repr__(self) -> str:
+        return f"SortedList({list(self)!r})"
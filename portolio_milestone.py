@@ -1,3 +1,10 @@
+import sys
+from pathlib import Path
+
+# shared sort modules live in portfolio_project
+sys.path.append(str(Path(__file__).resolve().parent / "portfolio_project"))
+from sort_algos import binary_insertion
+
 def selection_sort(arr: list[int]) -> None: 
     """Sort a list of integers in in place with selection sort.
 
@@ -26,8 +33,9 @@ def insertion_sort(arr: list[int]) -> None:
 
     This function implements insertion sort by iterating from 
     the second element to the end of the list and inserting each
-    element into the already sorted part by shifting larger values 
-    one place to the right until in correct position. 
+    element into the already sorted part. Uses the shared
+    sort_algos.binary_insertion engine, which finds the insertion point
+    with binary search and shifts larger values right as one block.
 
     Args:
         arr (list[int]): The list of integers to sort, modified in 
@@ -36,13 +44,7 @@ def insertion_sort(arr: list[int]) -> None:
     Returns:
         None
     """
-    for i in range(1, len(arr)):
-        j = i
-        # Shift element at arr[j] left until in correct position
-        while j > 0 and arr[j] < arr[j - 1]:
-            #Swap element j and j-1 when not in correct position
-            arr[j], arr[j - 1] = arr[j-1], arr[j]
-            j -= 1
+    binary_insertion(arr)
 
 
 def merge(arr: list[int], i: int, j: int, k: int) -> None:
@@ -5,9 +5,16 @@ User can input an array size to compare radix vs insertion sort times.
 """
 
 import random
-import time
-from functools import wraps
-from typing import Any, List, Optional
+import sys
+from pathlib import Path
+from typing import List
+
+# shared sort and benchmark modules live in portfolio_project
+sys.path.append(str(Path(__file__).resolve().parent / "portfolio_project"))
+from dispatch import is_buffer, sort_buffer
+from function_timer import timer, benchmark, measure_memory
+from sort_algos import binary_insertion
+from sorted_list import SortedList
 
 
 def random_array_generator(n: int) -> List[int]:
@@ -21,44 +28,6 @@ def random_array_generator(n: int) -> List[int]:
     """
     return random.sample(range(-9999, 9999), n)
 
-def timer(func):
-
-    """Decorator that measures the execution time of a function
-
-    Wraps the target function, records start and end time to find the
-    time elapsed, and saves it in `wrapper.last_run`.
-
-    Args:
-        func: The function to be decorated
-
-    Returns:
-        The wrapper function. After each call, you can read 
-        `wrapped_func.last_run` to get run time in seconds. 
-
-    Attributes:
-        last_run (Optional[float]): Time in seconds of the most recent call,
-            or None if the function has not yet been called.
-    """
-
-
-    @wraps(func)
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
-        """Inner wrapper that times a single call."""
-        # record start time
-        start = time.perf_counter()
-        # run function
-        result = func(*args, **kwargs)
-        # stop timer and find runtime
-        run_time = time.perf_counter() - start 
-        # store run_tim as last run
-        wrapper.last_run = run_time
-        # pass returned results from function
-        return result
-    # clear last_run value
-    wrapper.last_run: Optional[float] = None
-    return wrapper
-
-
 def radix_get_length(num: int) -> int: 
     """Find the number of digits in an integer
     
@@ -85,12 +54,20 @@ def radix_sort(arr: list[int]) -> None:
     Once sorted by magnitude split negatives, reverse them and
     recombine negatives then positives. 
 
+    NumPy arrays and array.array inputs are sorted in place by the
+    vectorized radix sort in array_sorts instead of the list loops.
+
     Args:
         arr(list[int]) a list of integers to be sorted, modified in place
 
     Returns:
         None
     """
+    # buffers skip the list based buckets so values stay unboxed
+    if not isinstance(arr, list) and is_buffer is not None and is_buffer(arr):
+        sort_buffer(arr)
+        return
+
     # Create a list of 10 lists, one for each digit value 0-9
     buckets: List[List[int]] = [[] for _ in range(10)]
 
@@ -128,8 +105,9 @@ def insertion_sort(arr: list[int]) -> None:
 
     This function implements insertion sort by iterating from 
     the second element to the end of the list and inserting each
-    element into the already sorted part by shifting larger values 
-    one place to the right until in correct position. 
+    element into the already sorted part. Uses the shared
+    sort_algos.binary_insertion engine, which finds the insertion point
+    with binary search and shifts larger values right as one block.
 
     Args:
         arr (list[int]): The list of integers to sort, modified in 
@@ -138,13 +116,7 @@ def insertion_sort(arr: list[int]) -> None:
     Returns:
         None
     """
-    for i in range(1, len(arr)):
-        j = i
-        # Shift element at arr[j] left until in correct position
-        while j > 0 and arr[j] < arr[j - 1]:
-            #Swap element j and j-1 when not in correct position
-            arr[j], arr[j - 1] = arr[j-1], arr[j]
-            j -= 1
+    binary_insertion(arr)
 
 def collect_user_size() -> int:
     """
@@ -181,19 +153,28 @@ if __name__ == '__main__':
     print("All test passed list sorted by both\n")
 
     size = collect_user_size()
-    a1 = random_array_generator(size)
-    a2 = a1.copy()
+    unsorted = random_array_generator(size)
+    nearly_sorted = sorted(unsorted) + [1]
 
+    # every trial sorts a fresh copy so no trial sees presorted data
     print(f"For the unsort list of {size} integers:")
-    radix_sort(a1)
-    print(f"Radix sort completed in {round(radix_sort.last_run,8)} seconds.")
-    insertion_sort(a2)
-    print(f"Insertion sort completed in {round(insertion_sort.last_run,8)} seconds.")
-    a1.append(1)
-    a2.append(1)
+    for name, func in [("Radix", radix_sort), ("Insertion", insertion_sort)]:
+        stats = benchmark(func, lambda: (unsorted.copy(),))
+        print(f"{name} sort completed in {round(stats.median,8)} seconds "
+              f"(median of {stats.repeat} trials, IQR {stats.iqr:.2e}).")
 
     print(f"\nFor the nearly sorted list of {size+1} integers:")
-    radix_sort(a1)
-    print(f"Radix sort completed in {round(radix_sort.last_run,8)} seconds.")
-    insertion_sort(a2)
-    print(f"Insertion sort completed in {round(insertion_sort.last_run,8)} seconds.")
+    for name, func in [("Radix", radix_sort), ("Insertion", insertion_sort)]:
+        stats = benchmark(func, lambda: (nearly_sorted.copy(),))
+        print(f"{name} sort completed in {round(stats.median,8)} seconds "
+              f"(median of {stats.repeat} trials, IQR {stats.iqr:.2e}).")
+    # a SortedList takes the new value in O(log n), no re-sort needed
+    stats = benchmark(SortedList.add, lambda: (SortedList(unsorted), 1), number=1)
+    print(f"SortedList.add kept it sorted in {round(stats.median,8)} seconds.")
+
+    # memory of the digit buckets compared with sorting in place
+    print(f"\nMemory for the unsort list of {size} integers:")
+    for name, func in [("Radix", radix_sort), ("Insertion", insertion_sort)]:
+        usage = measure_memory(func, lambda: (unsorted.copy(),))
+        print(f"{name} sort peak {usage.peak} bytes, retained {usage.retained} bytes "
+              f"in {usage.blocks} blocks.")
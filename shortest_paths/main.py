@@ -1,12 +1,29 @@
 import operator
+import random
+import sys
+from pathlib import Path
 from typing import List, Tuple
 from graph import Graph, Vertex
 from shortest_paths import (
     dijkstra, bellman_ford, get_shortest_path, reset_state
 )
 
+# shared benchmark tools live in portfolio_project
+sys.path.append(str(Path(__file__).resolve().parent.parent / "portfolio_project"))
+from function_timer import benchmark, measure_memory
+from op_counter import count_operations
+from bench_history import HISTORY_PATH, record
+from complexity import fit_frame
+import pandas as pd
+
 a,b,c,d = Vertex('a'), Vertex('b'), Vertex('c'), Vertex('d')
 
+# complexity class of each algorithm as implemented in shortest_paths.py,
+# dijkstra scans the unvisited list for the closest vertex
+GRAPH_COMPLEXITY = {'Bellman-Ford': 'V * E', 'Dijkstra': 'V^2'}
+# (V, E) sizes predicted by scaling_test
+GRAPH_PRODUCTION_SIZES = ((10**4, 4 * 10**4), (10**5, 4 * 10**5))
+
 def create_graph(
     edges: List[Tuple[Vertex, Vertex, float]],
     is_directed: bool = False
@@ -26,13 +43,39 @@ def create_graph(
         g.add_edge_list(u,v,w)
     return g
 
-def dijkstra_vs_bellman(g, start_vertex):
+def dijkstra_vs_bellman(g, start_vertex, history=HISTORY_PATH):
+    """
+    Time Bellman-Ford and, without a negative cycle, Dijkstra from
+    start_vertex, print both shortest path trees and append the timings
+    to the benchmark history.
+
+    Args:
+        g (Graph): graph to search
+        start_vertex (Vertex): source vertex
+        history (PathLike, optional): history file for bench_history,
+            None to skip recording
+    """
+    #graphs are identified by their edges in the history
+    graph_case = {
+        'start': start_vertex.label,
+        'vertices': len(g.adj_list),
+        'directed': g.directed,
+        'edges': ",".join(sorted(f"{u.label}-{v.label}:{w}"
+                                 for (u, v), w in g.edge_weights.items()))
+    }
+    recorded = []
     #bellman
-    reset_state(g)
-    no_negative_cycle = bellman_ford(g, start_vertex)
-    b_run_time = bellman_ford.last_time
+    #every trial resets the graph first, outside the timed region
+    def setup():
+        reset_state(g)
+        return (g, start_vertex)
+    stats = benchmark(bellman_ford, setup, number=1)
+    #one more run on a fresh graph leaves its distances and links to print
+    no_negative_cycle = bellman_ford(*setup())
+    b_run_time = stats.median
+    recorded.append(({'algorithm': 'Bellman-Ford', **graph_case}, stats.samples))
     status = "negative cycle detected" if not no_negative_cycle else "no negative cycle"
-    print(f"\nBellman-Ford took {b_run_time} seconds ({status})")
+    print(f"\nBellman-Ford took {b_run_time} seconds (median of {stats.repeat} runs, {status})")
     if no_negative_cycle:
         for v in sorted(g.adj_list, key=operator.attrgetter("label")):
             if v is not start_vertex and v.pred_vertex is None:
@@ -42,10 +85,10 @@ def dijkstra_vs_bellman(g, start_vertex):
                 print(f"{start_vertex.label} → {v.label}: {path} (cost={v.distance})")
     if no_negative_cycle:
     # dijkstra
-        reset_state(g)
-        dijkstra(g, start_vertex)
-        d_run_time = dijkstra.last_time
-        print(f"\nDijkstra took {d_run_time} seconds")
+        stats = benchmark(dijkstra, setup, number=1)
+        d_run_time = stats.median
+        recorded.append(({'algorithm': 'Dijkstra', **graph_case}, stats.samples))
+        print(f"\nDijkstra took {d_run_time} seconds (median of {stats.repeat} runs)")
         for v in sorted(g.adj_list, key=operator.attrgetter("label")):
             if v.pred_vertex is None and v is not start_vertex:
                  print(f"{start_vertex.label} → {v.label}: no path exists")
@@ -54,8 +97,125 @@ def dijkstra_vs_bellman(g, start_vertex):
                 print(f"{start_vertex.label} → {v.label}: {path} (cost={v.distance})")
     else: 
         print("Skipping Dijkstra, Negative Cycle found by Bellman-Ford")
+    if history is not None:
+        record('shortest paths', recorded, history)
 
     
+def random_edges(
+    num_vertices: int,
+    num_edges: int
+) -> List[Tuple[Vertex, Vertex, float]]:
+    """
+    Random directed edges with nonnegative weights, every vertex
+    reachable from vertex '0' through a path 0 -> 1 -> ... -> V-1.
+
+    Args:
+        num_vertices (int): number of vertices V >= 2
+        num_edges (int): number of edges E >= V - 1
+
+    Returns:
+        List[Tuple[Vertex, Vertex, float]]: (u, v, weight) triples
+    """
+    vertices = [Vertex(str(i)) for i in range(num_vertices)]
+    edges = [(vertices[i], vertices[i + 1], random.randint(1, 100))
+             for i in range(num_vertices - 1)]
+    while len(edges) < num_edges:
+        u, v = random.sample(vertices, 2)
+        edges.append((u, v, random.randint(1, 100)))
+    return edges
+
+def random_graph(num_vertices: int, num_edges: int) -> Graph:
+    """Directed graph built from random_edges."""
+    return create_graph(random_edges(num_vertices, num_edges), True)
+
+# sparse and dense graphs, so V^2 and V * E scaling can be told apart
+SCALING_SIZES = ((16, 64), (32, 128), (32, 512), (64, 256), (64, 1024),
+                 (128, 512), (128, 2048), (256, 1024))
+
+def graph_benchmark(sizes=SCALING_SIZES, counts=True):
+    """
+    Time both algorithms on random graphs of growing size.
+
+    Args:
+        sizes (Iterable[Tuple[int, int]]): (V, E) of each graph to test
+        counts (bool): add operation counts from instrumented copies,
+            the timed runs are never instrumented
+
+    Returns:
+        df (Pandas DataFrame): one row per algorithm and graph with columns:
+            Algorithm - which algorithm results are for
+            Size - (V, E) of the graph
+            Time - median seconds of repeated runs
+        and with counts on:
+            Relaxations - distance updates, edges whose relaxation
+                lowered the distance
+            Queue Ops - vertices taken from the unvisited queue
+            Comparisons - distance comparisons, relaxations and queue scans
+    """
+    results = []
+    for num_vertices, num_edges in sizes:
+        g = random_graph(num_vertices, num_edges)
+        start_vertex = next(iter(g.adj_list))
+        def setup():
+            reset_state(g)
+            return (g, start_vertex)
+        for name, func in [("Bellman-Ford", bellman_ford), ("Dijkstra", dijkstra)]:
+            stats = benchmark(func, setup, number=1)
+            results.append({'Algorithm': name, 'Size': (num_vertices, num_edges),
+                            'Time': stats.median})
+            if counts:
+                ops = count_operations(func, *setup())
+                results[-1].update({'Relaxations': ops['updates'],
+                                    'Queue Ops': ops['queue ops'],
+                                    'Comparisons': ops['comparisons']})
+    return pd.DataFrame(results)
+
+def scaling_test(sizes=SCALING_SIZES, results=None):
+    """
+    Fit how each algorithm's time scales with V and E.
+
+    Args:
+        sizes (Iterable[Tuple[int, int]]): (V, E) of each graph to test
+        results (Pandas DataFrame, optional): graph_benchmark output to
+            fit instead of running a new one
+
+    Returns:
+        df (Pandas DataFrame): complexity.fit_frame table per algorithm
+            with times predicted at GRAPH_PRODUCTION_SIZES
+    """
+    if results is None:
+        results = graph_benchmark(sizes, counts=False)
+    return fit_frame(results, ['Algorithm'],
+                     expected=lambda s: GRAPH_COMPLEXITY[s[0]],
+                     production_sizes=GRAPH_PRODUCTION_SIZES)
+
+def graph_memory_test(sizes=SCALING_SIZES):
+    """
+    Trace the memory create_graph allocates for random graphs, the edge
+    lists are built before tracing starts.
+
+    Args:
+        sizes (Iterable[Tuple[int, int]]): (V, E) of each graph to build
+
+    Returns:
+        df (Pandas DataFrame): one row per graph with columns:
+            V, E - graph size
+            Peak Bytes - most memory allocated at once while building
+            Retained Bytes - memory the finished graph holds
+            Retained Blocks - memory blocks the finished graph holds
+            Bytes per Edge - Retained Bytes / E
+    """
+    results = []
+    for num_vertices, num_edges in sizes:
+        usage = measure_memory(create_graph,
+                               lambda: (random_edges(num_vertices, num_edges), True))
+        results.append({'V': num_vertices, 'E': num_edges,
+                        'Peak Bytes': usage.peak,
+                        'Retained Bytes': usage.retained,
+                        'Retained Blocks': usage.blocks,
+                        'Bytes per Edge': usage.retained / num_edges})
+    return pd.DataFrame(results)
+
 
 if __name__ == "__main__":
 
@@ -98,4 +258,17 @@ if __name__ == "__main__":
     print("\n=== Graph C (directed, negative edge) ===")
     gC = create_graph(negative_edge, True)
     gC.display_list()
-    dijkstra_vs_bellman(gC, a)
\ No newline at end of file
+    dijkstra_vs_bellman(gC, a)
+
+    print("\n=== Random graphs ===")
+    graph_df = graph_benchmark()
+    print(graph_df.to_string(index=False))
+
+    print("\n=== Scaling on random graphs ===")
+    scaling_df = scaling_test(results=graph_df)
+    print(scaling_df.drop(columns='Warning').to_string(index=False))
+    for _, row in scaling_df[scaling_df['Warning'] != ''].iterrows():
+        print(f"WARNING: {row['Algorithm']} {row['Warning']}")
+
+    print("\n=== Graph construction memory ===")
+    print(graph_memory_test().to_string(index=False))
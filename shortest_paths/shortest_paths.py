@@ -12,33 +12,13 @@ Depends on:
     Graph and Vertex classes from graphs.py
 """
 
-import time
+import sys
+from pathlib import Path
 from graph import Graph, Vertex
-from functools import wraps
 
-def time_execution(func):
-    """
-    Decorator that records the execution time of the decorated function.
-
-    Args:
-        func (callable): The function to wrap.
-
-    Returns:
-        callable: A wrapped version of `func` that allows calling 
-        last_time to get execution time.
-    """
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        """
-        Inner wrapper that times a single call to `func`.
-        """
-        start = time.perf_counter() # start time
-        results = func(*args, **kwargs) #store any returned values
-        run_time = time.perf_counter() - start
-        wrapper.last_time = run_time
-        return results
-    wrapper.last_time = None # reset before each new run
-    return wrapper
+# shared timing tools live in portfolio_project
+sys.path.append(str(Path(__file__).resolve().parent.parent / "portfolio_project"))
+from function_timer import time_execution
 
 @time_execution
 def dijkstra(g: Graph, start_vertex: Vertex) -> None: